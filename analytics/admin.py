@@ -1,3 +1,15 @@
 from django.contrib import admin
+from .models import DailySummary, ProductDailySummary
 
-# Register your models here.
+
+@admin.register(DailySummary)
+class DailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'sale_type', 'created_by', 'sales_count', 'sales_total', 'credit_sales_total', 'credit_outstanding', 'expenses_total')
+    list_filter = ('sale_type', 'date')
+
+
+@admin.register(ProductDailySummary)
+class ProductDailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'product', 'units', 'kg_sold', 'revenue')
+    list_filter = ('date',)
+    list_select_related = ('product',)
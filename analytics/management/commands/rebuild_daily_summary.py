@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from analytics.services import rebuild_daily_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailySummary and ProductDailySummary tables from Sale, SaleItem and Expense history"
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_daily_summary()
+        self.stdout.write(self.style.SUCCESS(f"Daily summaries rebuilt ({rows} rows)"))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:15
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('sale_type', models.CharField(blank=True, default='', max_length=20)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('sales_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credit_sales_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credit_outstanding', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('expenses_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'sale_type', 'created_by'), name='daily_summary_unique_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    Sale = apps.get_model("sales", "Sale")
+    Expense = apps.get_model("expenses", "Expense")
+    DailySummary = apps.get_model("analytics", "DailySummary")
+
+    outstanding = ExpressionWrapper(
+        F("total_amount") - F("amount_paid"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    buckets = {}
+    for r in (
+        Sale.objects.annotate(day=TruncDate("timestamp"))
+        .values("day", "sale_type", "created_by")
+        .annotate(
+            sales_count=Count("id"),
+            sales_total=Sum("total_amount"),
+            credit_sales_total=Sum("total_amount", filter=Q(is_credit=True)),
+            credit_outstanding=Sum(outstanding, filter=Q(is_credit=True)),
+        )
+        .order_by()
+    ):
+        buckets[(r["day"], r["sale_type"], r["created_by"])] = {
+            k: r[k] or 0 for k in ("sales_count", "sales_total", "credit_sales_total", "credit_outstanding")
+        }
+    for r in (
+        Expense.objects.annotate(day=TruncDate("timestamp"))
+        .values("day", "created_by")
+        .annotate(expenses_total=Sum("amount"))
+        .order_by()
+    ):
+        buckets.setdefault((r["day"], "", r["created_by"]), {})["expenses_total"] = r["expenses_total"] or Decimal("0.00")
+
+    DailySummary.objects.bulk_create(
+        [
+            DailySummary(date=day, sale_type=stype, created_by_id=user_id, **values)
+            for (day, stype, user_id), values in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+        ("sales", "0001_initial"),
+        ("expenses", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:39
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_backfill_daily_summary'),
+        ('inventory', '0002_product_product_low_stock_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('kg_sold', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='product_daily_summary_unique')],
+            },
+        ),
+    ]
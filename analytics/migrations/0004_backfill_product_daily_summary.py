@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill(apps, schema_editor):
+    SaleItem = apps.get_model("sales", "SaleItem")
+    ProductDailySummary = apps.get_model("analytics", "ProductDailySummary")
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    rows = (
+        SaleItem.objects.annotate(day=TruncDate("sale__timestamp"))
+        .values("day", "product")
+        .annotate(
+            units=Sum("quantity"),
+            kg_sold=Sum(ExpressionWrapper(F("quantity") * F("weight_price__weight_kg"), output_field=money)),
+            revenue=Sum(ExpressionWrapper(F("quantity") * F("unit_price"), output_field=money)),
+        )
+        .order_by()
+    )
+    ProductDailySummary.objects.bulk_create(
+        [
+            ProductDailySummary(
+                date=r["day"], product_id=r["product"],
+                units=r["units"] or 0,
+                kg_sold=r["kg_sold"] or Decimal("0.00"),
+                revenue=r["revenue"] or Decimal("0.00"),
+            )
+            for r in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0003_product_daily_summary"),
+        ("sales", "0002_sale_sale_ts_id_idx_sale_sale_type_ts_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_backfill_product_daily_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysummary',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='dailysummary',
+            index=models.Index(fields=['updated_at'], name='daily_summary_updated_idx'),
+        ),
+    ]
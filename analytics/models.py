@@ -1,3 +1,59 @@
+from decimal import Decimal
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class DailySummary(models.Model):
+    """
+    Pre-aggregated totals per day × sale type × user.
+    Kept up to date by analytics.services on every sale / credit payment / expense save and delete,
+    and rebuilt from history with `manage.py rebuild_daily_summary`.
+    Expense-only rows use an empty sale_type.
+    """
+    date = models.DateField()
+    sale_type = models.CharField(max_length=20, blank=True, default="")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    sales_count = models.IntegerField(default=0)
+    sales_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credit_sales_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credit_outstanding = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    expenses_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    # set on every write (analytics.services._bump): MAX(updated_at) versions the chart API
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "sale_type", "created_by"], name="daily_summary_unique_bucket"),
+        ]
+        indexes = [
+            models.Index(fields=["updated_at"], name="daily_summary_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.sale_type or 'expenses'} — ₵{self.sales_total}"
+
+
+class ProductDailySummary(models.Model):
+    """
+    Units, kg and line revenue sold per product per day (before sale-level discount/VAT).
+    Kept up to date by sales.services.commit_sale_items (and SaleItem save/delete for
+    admin edits), rebuilt with `manage.py rebuild_daily_summary`; backs the best-sellers
+    on the reports page.
+    """
+    date = models.DateField()
+    product = models.ForeignKey("inventory.Product", on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    units = models.IntegerField(default=0)
+    kg_sold = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "product"], name="product_daily_summary_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} product #{self.product_id} — ₵{self.revenue}"
@@ -0,0 +1,369 @@
+# analytics/services.py
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count, F, Max, Q, ExpressionWrapper, DecimalField
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import DailySummary, ProductDailySummary
+
+ZERO = Decimal("0.00")
+
+# chart buckets and the longest window (days) each may cover
+CHART_GROUPS = {"day": 366, "week": 731, "month": 1096}
+
+# windows offered on the analytics dashboard (days)
+DASHBOARD_WINDOWS = (7, 30, 90, 365)
+DEFAULT_WINDOW = 7
+
+SUMMARY_FIELDS = ("sales_count", "sales_total", "credit_sales_total", "credit_outstanding", "expenses_total")
+
+
+def day_bounds(start, end):
+    """
+    Aware datetimes covering the dates start..end (inclusive) in the current timezone.
+    Filtering on a timestamp range (instead of timestamp__date) keeps the column indexable.
+    """
+    tz = timezone.get_current_timezone()
+    lo = timezone.make_aware(datetime.combine(start, time.min), tz)
+    hi = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    return lo, hi
+
+
+def date_range(start, end):
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def outstanding_expr():
+    return ExpressionWrapper(
+        F("total_amount") - F("amount_paid"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+# --------------------------
+# Incremental maintenance
+# --------------------------
+def _upsert(model, lookup, deltas, **values):
+    """
+    Add deltas to the summary row matching `lookup`, creating it on first write.
+    `values` are set as they are (updated_at: update() skips auto_now).
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+
+    bucket = model.objects.filter(**lookup)
+    changes = {**{k: F(k) + v for k, v in deltas.items()}, **values}
+    if bucket.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas, **values)
+    except IntegrityError:
+        # another writer created the bucket first
+        bucket.update(**changes)
+
+
+def _bump(day, sale_type, user_id, deltas):
+    """Add deltas to one DailySummary bucket."""
+    _upsert(
+        DailySummary, {"date": day, "sale_type": sale_type, "created_by_id": user_id}, deltas,
+        updated_at=timezone.now(),
+    )
+
+
+def sale_contribution(sale):
+    """What a sale currently adds to its summary bucket."""
+    total = sale.total_amount or ZERO
+    is_credit = bool(sale.is_credit)
+    return {
+        "sales_count": 1,
+        "sales_total": total,
+        "credit_sales_total": total if is_credit else ZERO,
+        "credit_outstanding": (total - (sale.amount_paid or ZERO)) if is_credit else ZERO,
+    }
+
+
+def _apply_change(before, after, bucket, contribution):
+    """
+    Bump the summary by after - before, where each is a stored state of the same row
+    (None = not there). An edit that moves the row to another bucket (date, sale type,
+    cashier) comes out of the old bucket and into the new one.
+    """
+    changes = {}
+    for obj, sign in ((before, -1), (after, 1)):
+        if obj is None:
+            continue
+        deltas = changes.setdefault(bucket(obj), {})
+        for k, v in contribution(obj).items():
+            deltas[k] = deltas.get(k, 0) + sign * v
+    for (day, sale_type, user_id), deltas in changes.items():
+        _bump(day, sale_type, user_id, deltas)
+
+
+def _sale_bucket(sale):
+    return timezone.localdate(sale.timestamp), sale.sale_type, sale.created_by_id
+
+
+def _expense_bucket(expense):
+    return timezone.localdate(expense.timestamp), "", expense.created_by_id
+
+
+def _expense_contribution(expense):
+    return {"expenses_total": expense.amount or ZERO}
+
+
+def record_sale(before, after):
+    """
+    Apply a sale write to the summary table: `before` is the sale as stored before the
+    write (None when it is new), `after` as stored after it (None when deleted).
+    Called by Sale.save and the Sale delete signal.
+    """
+    _apply_change(before, after, _sale_bucket, sale_contribution)
+
+
+def record_expense(before, after):
+    """Same as record_sale for an expense."""
+    _apply_change(before, after, _expense_bucket, _expense_contribution)
+
+
+def record_sale_items(sale, items, sign=1):
+    """Add (sign=-1: remove) a sale's items to the per-product daily rollup (one bucket per product)."""
+    day = timezone.localdate(sale.timestamp)
+    per_product = {}
+    for it in items:
+        d = per_product.setdefault(it.product_id, {"units": 0, "kg_sold": ZERO, "revenue": ZERO})
+        d["units"] += sign * it.quantity
+        d["kg_sold"] += sign * it.sold_weight_kg()
+        d["revenue"] += sign * it.line_total()
+    for product_id, deltas in sorted(per_product.items(), key=lambda kv: kv[0] or 0):
+        _upsert(ProductDailySummary, {"date": day, "product_id": product_id}, deltas)
+
+
+@transaction.atomic
+def rebuild_daily_summary():
+    """Recompute every summary row from Sale and Expense history. Returns the number of rows written."""
+    from sales.models import Sale
+    from expenses.models import Expense
+
+    buckets = {}
+
+    sale_rows = (
+        Sale.objects.annotate(day=TruncDate("timestamp"))
+        .values("day", "sale_type", "created_by")
+        .annotate(
+            sales_count=Count("id"),
+            sales_total=Sum("total_amount"),
+            credit_sales_total=Sum("total_amount", filter=Q(is_credit=True)),
+            credit_outstanding=Sum(outstanding_expr(), filter=Q(is_credit=True)),
+        )
+        .order_by()
+    )
+    for r in sale_rows:
+        row = buckets.setdefault((r["day"], r["sale_type"], r["created_by"]), {})
+        for k in ("sales_count", "sales_total", "credit_sales_total", "credit_outstanding"):
+            row[k] = r[k] or 0
+
+    expense_rows = (
+        Expense.objects.annotate(day=TruncDate("timestamp"))
+        .values("day", "created_by")
+        .annotate(expenses_total=Sum("amount"))
+        .order_by()
+    )
+    for r in expense_rows:
+        buckets.setdefault((r["day"], "", r["created_by"]), {})["expenses_total"] = r["expenses_total"] or ZERO
+
+    DailySummary.objects.all().delete()
+    DailySummary.objects.bulk_create(
+        [
+            DailySummary(date=day, sale_type=stype, created_by_id=user_id, **values)
+            for (day, stype, user_id), values in buckets.items()
+        ],
+        batch_size=1000,
+    )
+    return len(buckets) + rebuild_product_daily_summary()
+
+
+@transaction.atomic
+def rebuild_product_daily_summary():
+    """Recompute ProductDailySummary from SaleItem history. Returns the number of rows written."""
+    from sales.models import SaleItem
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    item_rows = (
+        SaleItem.objects.annotate(day=TruncDate("sale__timestamp"))
+        .values("day", "product")
+        .annotate(
+            units=Sum("quantity"),
+            kg_sold=Sum(ExpressionWrapper(F("quantity") * F("weight_price__weight_kg"), output_field=money)),
+            revenue=Sum(ExpressionWrapper(F("quantity") * F("unit_price"), output_field=money)),
+        )
+        .order_by()
+    )
+    rows = [
+        ProductDailySummary(
+            date=r["day"], product_id=r["product"],
+            units=r["units"] or 0, kg_sold=r["kg_sold"] or ZERO, revenue=r["revenue"] or ZERO,
+        )
+        for r in item_rows
+    ]
+    ProductDailySummary.objects.all().delete()
+    ProductDailySummary.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+# --------------------------
+# Readers
+# --------------------------
+def summary_last_modified():
+    """
+    Time of the latest DailySummary write (any sale / payment / expense insert, edit or
+    delete, or a rebuild); None when the table is empty. One index lookup.
+    """
+    return DailySummary.objects.aggregate(m=Max("updated_at"))["m"]
+
+
+def _summary_qs(start=None, end=None, created_by=None, sale_type=None):
+    qs = DailySummary.objects.all()
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    if created_by is not None:
+        qs = qs.filter(created_by=created_by)
+    if sale_type:
+        # expense rows have no sale type, so they drop out here
+        qs = qs.filter(sale_type=sale_type)
+    return qs
+
+
+def daily_rollup(start, end, created_by=None, sale_type=None):
+    """
+    Sales, credit sales, credit outstanding and expenses per day for start..end,
+    read from DailySummary in one grouped query whatever the size of the window.
+    Returns one dict per day (missing days are zero-filled), oldest first.
+    """
+    summary_rows = (
+        _summary_qs(start, end, created_by, sale_type)
+        .values("date")
+        .annotate(
+            sales=Sum("sales_total"),
+            credit_sales=Sum("credit_sales_total"),
+            credit_outstanding=Sum("credit_outstanding"),
+            expenses=Sum("expenses_total"),
+        )
+        .order_by()
+    )
+    by_day = {r["date"]: r for r in summary_rows}
+
+    rows = []
+    for d in date_range(start, end):
+        s = by_day.get(d, {})
+        sales = s.get("sales") or ZERO
+        expenses = s.get("expenses") or ZERO
+        rows.append({
+            "date": d,
+            "sales": sales,
+            "credit_sales": s.get("credit_sales") or ZERO,
+            "credit_outstanding": s.get("credit_outstanding") or ZERO,
+            "expenses": expenses,
+            "profit": sales - expenses,
+        })
+    return rows
+
+
+def rollup_totals(rows):
+    """Sum a daily_rollup() result over the whole window (no extra queries)."""
+    keys = ("sales", "credit_sales", "credit_outstanding", "expenses", "profit")
+    return {k: sum((r[k] for r in rows), ZERO) for k in keys}
+
+
+def period_totals(start=None, end=None, created_by=None, sale_type=None):
+    """Totals over an optional (possibly open-ended) date range in one aggregate query."""
+    agg = _summary_qs(start, end, created_by, sale_type).aggregate(
+        **{k: Sum(k) for k in SUMMARY_FIELDS}
+    )
+    return {k: agg[k] or (0 if k == "sales_count" else ZERO) for k in SUMMARY_FIELDS}
+
+
+def bucket_start(day, group):
+    """First day of the day/week (Monday)/month bucket containing `day`."""
+    if group == "week":
+        return day - timedelta(days=day.weekday())
+    if group == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _buckets(start, end, group):
+    out, d = [], bucket_start(start, group)
+    while d <= end:
+        out.append(d)
+        if group == "month":
+            d = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            d += timedelta(days=7 if group == "week" else 1)
+    return out
+
+
+def chart_series(start, end, group="day", created_by=None, sale_type=None):
+    """
+    Like daily_rollup() but bucketed by day, week or month: one grouped query on
+    DailySummary, zero-filled, oldest first. `start` is moved back to its bucket start.
+    """
+    start = bucket_start(start, group)
+    key = {"day": F("date"), "week": TruncWeek("date"), "month": TruncMonth("date")}[group]
+    grouped = (
+        _summary_qs(start, end, created_by, sale_type)
+        .annotate(bucket=key)
+        .values("bucket")
+        .annotate(
+            sales=Sum("sales_total"),
+            credit_sales=Sum("credit_sales_total"),
+            credit_outstanding=Sum("credit_outstanding"),
+            expenses=Sum("expenses_total"),
+        )
+        .order_by()
+    )
+    by_bucket = {}
+    for r in grouped:
+        b = r["bucket"]
+        by_bucket[b.date() if isinstance(b, datetime) else b] = r
+
+    rows = []
+    for b in _buckets(start, end, group):
+        s = by_bucket.get(b, {})
+        sales = s.get("sales") or ZERO
+        expenses = s.get("expenses") or ZERO
+        rows.append({
+            "date": b,
+            "sales": sales,
+            "credit_sales": s.get("credit_sales") or ZERO,
+            "credit_outstanding": s.get("credit_outstanding") or ZERO,
+            "expenses": expenses,
+            "profit": sales - expenses,
+        })
+    return rows
+
+
+def product_performance(start=None, end=None, limit=10, order_by="revenue"):
+    """
+    Best sellers for an optional date range from ProductDailySummary in one grouped query:
+    units, kg sold, revenue and average unit price per product, best first.
+    """
+    qs = ProductDailySummary.objects.all()
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    rows = list(
+        qs.values("product_id", "product__name")
+        .annotate(units=Sum("units"), kg_sold=Sum("kg_sold"), revenue=Sum("revenue"))
+        .order_by(f"-{order_by}", "product__name")[:limit]
+    )
+    for r in rows:
+        r["avg_price"] = (r["revenue"] / r["units"]).quantize(Decimal("0.01")) if r["units"] else ZERO
+    return rows
@@ -1,3 +1,86 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from expenses.models import Expense
+from inventory.models import Product
+from sales.models import CreditPayment, Sale, SaleItem
+from sales.services import commit_sale
+
+from .models import DailySummary, ProductDailySummary
+from .services import rebuild_daily_summary
+
+
+def summary_state():
+    """Both summary tables without their all-zero rows (an edit can empty a bucket)."""
+    sales = {
+        (r.date, r.sale_type, r.created_by_id): (
+            r.sales_count, r.sales_total, r.credit_sales_total, r.credit_outstanding, r.expenses_total,
+        )
+        for r in DailySummary.objects.all()
+    }
+    products = {(r.date, r.product_id): (r.units, r.kg_sold, r.revenue) for r in ProductDailySummary.objects.all()}
+    return (
+        {k: v for k, v in sales.items() if any(v)},
+        {k: v for k, v in products.items() if any(v)},
+    )
+
+
+class DailySummaryMaintenanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("cashier")
+        self.other = User.objects.create_user("manager")
+        self.sausage = Product.objects.create(name="Sausage", unit_price=Decimal("3.00"), quantity=100)
+        self.cash = self.sell("cash", 4)
+        self.credit = self.sell("credit", 10, amount_paid=Decimal("5.00"))
+        self.expense = Expense.objects.create(amount=Decimal("40.00"), created_by=self.user)
+
+    def sell(self, payment_method, qty, amount_paid=Decimal("0.00")):
+        return commit_sale(
+            sale=Sale(payment_method=payment_method),
+            lines=[(self.sausage.id, None, qty)],
+            sale_type="retail", user=self.user, amount_paid=amount_paid,
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = summary_state()
+        rebuild_daily_summary()
+        self.assertEqual(incremental, summary_state())
+
+    def test_new_writes(self):
+        self.assertEqual(DailySummary.objects.get(sale_type="retail").credit_outstanding, Decimal("25.00"))
+        self.assertMatchesRebuild()
+
+    def test_edits(self):
+        sale = Sale.objects.get(pk=self.cash.pk)
+        sale.total_amount = Decimal("15.00")
+        sale.sale_type = "wholesale"  # moves to another bucket
+        sale.created_by = self.other
+        sale.save()
+
+        payment = self.credit.credit_payments.get()
+        payment.amount = Decimal("12.00")
+        payment.save()
+        CreditPayment.objects.create(sale=self.credit, amount=Decimal("3.00"))
+
+        item = SaleItem.objects.get(sale=self.credit)
+        item.quantity = 7
+        item.save()
+
+        self.expense.amount = Decimal("55.00")
+        self.expense.save()
+        self.assertMatchesRebuild()
+
+    def test_deletes(self):
+        self.credit.credit_payments.get().delete()
+        SaleItem.objects.get(sale=self.cash).delete()
+        self.expense.delete()
+        self.sell("credit", 2, amount_paid=Decimal("1.00")).delete()
+        self.assertMatchesRebuild()
+
+        # admin "delete selected": queryset deletes cascading to items and payments
+        Sale.objects.all().delete()
+        Expense.objects.all().delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(summary_state(), ({}, {}))
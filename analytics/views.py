@@ -1,79 +1,63 @@
-from django.db.models import Sum, F, ExpressionWrapper, DecimalField
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import timedelta
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
+from django.utils import timezone
 
-from sales.models import Sale
-from expenses.models import Expense
 from inventory.models import Product
-from users.utils import has_any_group  
+from users.roles import has_any_role
+from users.utils import has_any_group
+from .services import daily_rollup, rollup_totals, DASHBOARD_WINDOWS, DEFAULT_WINDOW
+
+
+def _window_days(value):
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_WINDOW
+    return days if days in DASHBOARD_WINDOWS else DEFAULT_WINDOW
+
 
 @login_required
 @has_any_group("SuperAdmin", "SubAdmin", "Admin", "Accountant")
 def analytics_dashboard(request):
-    today = datetime.today()
-    dates = [(today - timedelta(days=i)).date() for i in range(6, -1, -1)]
+    days = _window_days(request.GET.get("days"))
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
 
     # ✅ Admin/Accountant see all; others see only their own
-    sales_qs = Sale.objects.all()
-    expenses_qs = Expense.objects.all()  # adjust app/model name
+    created_by = None
     products_qs = Product.objects.all()
 
-    # sales_qs = Sale.objects.all()
-    # expenses_qs = Expense.objects.all()
-
-    if not (request.user.groups.filter(name="Admin").exists() or request.user.groups.filter(name="Accountant").exists()):
-        sales_qs = sales_qs.filter(created_by=request.user)
-        expenses_qs = expenses_qs.filter(created_by=request.user)
+    if not has_any_role(request.user, "Admin", "Accountant"):
+        created_by = request.user
         products_qs = products_qs.filter(created_by=request.user)
 
-    sales_data, expense_data, profit_data = [], [], []
-    credit_sales_data, credit_outstanding_data = [], []
-
-    for d in dates:
-        sales_total = sales_qs.filter(timestamp__date=d).aggregate(total=Sum("total_amount"))["total"] or Decimal("0.00")
-        expenses_total = expenses_qs.filter(timestamp__date=d).aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-
-        credit_sales_total = sales_qs.filter(timestamp__date=d, is_credit=True).aggregate(total=Sum("total_amount"))["total"] or Decimal("0.00")
-        credit_outstanding = sales_qs.filter(timestamp__date=d, is_credit=True).aggregate(total=Sum(ExpressionWrapper(F("total_amount") - F("amount_paid"), output_field=DecimalField()))) ["total"] or Decimal("0.00")
-
-        profit = sales_total - expenses_total
-
-        sales_data.append(float(sales_total))
-        expense_data.append(float(expenses_total))
-        profit_data.append(float(profit))
-        credit_sales_data.append(float(credit_sales_total))
-        credit_outstanding_data.append(float(credit_outstanding))
-
-    total_sales = sum(sales_data)
-    total_expenses = sum(expense_data)
-    total_profit = total_sales - total_expenses
-
-    # ✅ Overall credit metrics for the period
-    period_credit_sales = sales_qs.filter(is_credit=True, timestamp__date__in=dates).aggregate(total=Sum("total_amount"))["total"] or Decimal("0.00")
-    period_credit_outstanding = sales_qs.filter(is_credit=True, timestamp__date__in=dates).aggregate(total=Sum(ExpressionWrapper(F("total_amount") - F("amount_paid"), output_field=DecimalField()))) ["total"] or Decimal("0.00")
+    # pre-aggregated DailySummary rows: one query, flat for any window size
+    rows = daily_rollup(start, today, created_by=created_by)
+    totals = rollup_totals(rows)
 
     top_products = products_qs.order_by("-quantity")[:5]
 
     context = {
-        "dates": [d.strftime("%b %d") for d in dates],
-        "sales_data": sales_data,
-        "expense_data": expense_data,
-        "profit_data": profit_data,
+        "days": days,
+        "windows": DASHBOARD_WINDOWS,
+        "dates": [r["date"].strftime("%b %d") for r in rows],
+        "sales_data": [float(r["sales"]) for r in rows],
+        "expense_data": [float(r["expenses"]) for r in rows],
+        "profit_data": [float(r["profit"]) for r in rows],
 
         # ✅ credit series
-        "credit_sales_data": credit_sales_data,
-        "credit_outstanding_data": credit_outstanding_data,
+        "credit_sales_data": [float(r["credit_sales"]) for r in rows],
+        "credit_outstanding_data": [float(r["credit_outstanding"]) for r in rows],
 
         # totals
-        "total_sales": total_sales,
-        "total_expenses": total_expenses,
-        "total_profit": total_profit,
+        "total_sales": float(totals["sales"]),
+        "total_expenses": float(totals["expenses"]),
+        "total_profit": float(totals["profit"]),
 
         # ✅ summary
-        "period_credit_sales": float(period_credit_sales),
-        "period_credit_outstanding": float(period_credit_outstanding),
+        "period_credit_sales": float(totals["credit_sales"]),
+        "period_credit_outstanding": float(totals["credit_outstanding"]),
 
         "top_products": top_products,
     }
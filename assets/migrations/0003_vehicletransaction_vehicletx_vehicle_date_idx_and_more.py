@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_vehicle_alter_vehicletransaction_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicletransaction',
+            index=models.Index(fields=['vehicle', 'date', 'id'], name='vehicletx_vehicle_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicletransaction',
+            index=models.Index(fields=['vehicle', 'tx_type', 'date'], name='vehicletx_vehicle_type_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0003_vehicletransaction_vehicletx_vehicle_date_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vehicletransaction',
+            name='vehicletx_vehicle_type_idx',
+        ),
+    ]
@@ -0,0 +1,98 @@
+# coldstore/pagination.py
+import base64
+import binascii
+from datetime import date, datetime
+
+from django.db.models import Q
+
+PER_PAGE_CHOICES = (10, 25, 50, 100)
+DEFAULT_PER_PAGE = 10
+
+
+def parse_per_page(value, default=DEFAULT_PER_PAGE):
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return default
+    return n if n in PER_PAGE_CHOICES else default
+
+
+def _encode(values):
+    raw = "|".join(v.isoformat() if isinstance(v, (date, datetime)) else str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor, fields, model):
+    """Cursor string -> tuple of python values for `fields`, or None when it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = raw.split("|")
+        if len(parts) != len(fields):
+            return None
+        values = []
+        for name, part in zip(fields, parts):
+            internal = model._meta.get_field(name).get_internal_type()
+            if internal == "DateTimeField":
+                values.append(datetime.fromisoformat(part))
+            elif internal == "DateField":
+                values.append(date.fromisoformat(part))
+            else:
+                values.append(int(part))
+        return tuple(values)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def _beyond(fields, values, op):
+    """(f1, f2, ...) <op> (v1, v2, ...) as a Q, e.g. ts < t OR (ts = t AND id < i)."""
+    q = Q()
+    for i, name in enumerate(fields):
+        step = Q(**{f"{name}__{op}": values[i]})
+        for prev, value in zip(fields[:i], values[:i]):
+            step &= Q(**{prev: value})
+        q |= step
+    return q
+
+
+class KeysetPage:
+    """One page of a newest-first list; iterate it like a Paginator page."""
+
+    def __init__(self, object_list, has_next, has_previous, fields):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = _encode([getattr(object_list[-1], f) for f in fields]) if has_next else ""
+        self.previous_cursor = _encode([getattr(object_list[0], f) for f in fields]) if has_previous else ""
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_page(qs, *, after=None, before=None, per_page=DEFAULT_PER_PAGE, fields=("timestamp", "id")):
+    """
+    Newest-first page of `qs` ordered by `fields` (descending), using a cursor instead of OFFSET
+    so every page costs the same index range scan however deep it is.
+    `after` comes from page.next_cursor (older rows), `before` from page.previous_cursor (newer rows).
+    A malformed cursor falls back to the first page.
+    """
+    fields = tuple(fields)
+    model = qs.model
+    after_key = _decode(after, fields, model) if after else None
+    before_key = _decode(before, fields, model) if before else None
+
+    if before_key is not None:
+        # walk towards newer rows, then flip back to newest-first
+        rows = list(qs.filter(_beyond(fields, before_key, "gt")).order_by(*fields)[: per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(rows, has_next=bool(rows), has_previous=has_more, fields=fields)
+
+    if after_key is not None:
+        qs = qs.filter(_beyond(fields, after_key, "lt"))
+    rows = list(qs.order_by(*[f"-{f}" for f in fields])[: per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPage(rows, has_next=has_more, has_previous=after_key is not None and bool(rows), fields=fields)
@@ -97,6 +97,7 @@ INSTALLED_APPS = [
     "employees.apps.EmployeesConfig",
     "assets.apps.AssetsConfig",
     "finance.apps.FinanceConfig",
+    "analytics.apps.AnalyticsConfig",
 ]
 
 MIDDLEWARE = [
@@ -107,6 +108,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.UserRolesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -187,6 +189,19 @@ else:
         }
     }
 
+# Cache
+# --------------------------
+# Shared by every gunicorn worker (and the export worker): the user role and POS catalog
+# caches are invalidated by bumping version keys, which only works if all processes see
+# the same cache. The table is created by `manage.py createcachetable` (build.sh).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    }
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -211,6 +226,28 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Background export files (reports.ExportJob) are written by the export worker service and
+# downloaded through the web service. Separate Render services share no disk, so set
+# EXPORTS_BUCKET (+ AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY, and AWS_S3_ENDPOINT_URL for
+# S3-compatible providers) to keep them in a bucket; without it they stay under MEDIA_ROOT,
+# which only works when web and worker run on the same machine (local development).
+EXPORTS_BUCKET = os.getenv("EXPORTS_BUCKET", "")
+if EXPORTS_BUCKET:
+    EXPORTS_STORAGE = {
+        "BACKEND": "storages.backends.s3.S3Storage",
+        "OPTIONS": {
+            "bucket_name": EXPORTS_BUCKET,
+            "endpoint_url": os.getenv("AWS_S3_ENDPOINT_URL") or None,
+            "region_name": os.getenv("AWS_S3_REGION_NAME") or None,
+            "default_acl": "private",
+            "file_overwrite": False,
+        },
+    }
+else:
+    EXPORTS_STORAGE = {"BACKEND": "django.core.files.storage.FileSystemStorage"}
+# finished exports (and their files) are deleted by the worker after this many days
+EXPORTS_KEEP_DAYS = int(os.getenv("EXPORTS_KEEP_DAYS", "7"))
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employeeprofile_created_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['employee', 'clock_out'], name='attendance_emp_out_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(condition=models.Q(('clock_out__isnull', True)), fields=['employee', 'clock_in'], name='attendance_open_idx'),
+        ),
+    ]
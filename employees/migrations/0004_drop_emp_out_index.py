@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_attendancelog_attendance_emp_out_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendancelog',
+            name='attendance_emp_out_idx',
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -27,8 +28,10 @@ class AttendanceLog(models.Model):
 
     class Meta:
         ordering = ["-clock_in"]
-        
-        
+        indexes = [
+            # open logs (still clocked in) only: the clock-in/out checks and the "active now" list
+            models.Index(fields=["employee", "clock_in"], condition=Q(clock_out__isnull=True), name="attendance_open_idx"),
+        ]
 
     def hours_worked(self):
         if self.clock_out:
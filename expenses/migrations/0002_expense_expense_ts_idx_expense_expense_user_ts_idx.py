@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['timestamp'], name='expense_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['created_by', 'timestamp'], name='expense_user_ts_idx'),
+        ),
+    ]
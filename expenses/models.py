@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class ExpenseCategory(models.Model):
@@ -9,8 +9,37 @@ class Expense(models.Model):
     category = models.ForeignKey(ExpenseCategory, on_delete=models.SET_NULL, null=True)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     note = models.TextField(blank=True)
-    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    # expense_user_ts_idx (created_by, timestamp) serves created_by lookups
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, db_index=False)
     timestamp = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["timestamp"], name="expense_ts_idx"),
+            models.Index(fields=["created_by", "timestamp"], name="expense_user_ts_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        from analytics.services import record_expense
+
+        with transaction.atomic():
+            before = None
+            if not self._state.adding:
+                before = Expense.objects.only("timestamp", "created_by", "amount").filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            record_expense(before, self)
+
     def __str__(self):
         return f"{self.category} - {self.amount}"
+
+
+# Daily summary on deletes (admin, bulk actions); saves are handled in Expense.save
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_delete, sender=Expense)
+def expense_deleted(sender, instance, **kwargs):
+    from analytics.services import record_expense
+
+    record_expense(instance, None)
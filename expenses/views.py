@@ -66,43 +66,13 @@ def add_expense_category(request):
 # expenses/views.py
 
 
+@login_required
+@has_any_group("SuperAdmin", "SubAdmin", "Admin", "Accountant")
 def export_expenses_pdf(request):
-    expenses = Expense.objects.all().order_by('-timestamp')
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(40, height - 50, "Expenses Report")
-    p.setFont("Helvetica", 9)
-    p.drawString(40, height - 65, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-    y = height - 90
-    p.setFont("Helvetica-Bold", 9)
-    p.drawString(40, y, "Date")
-    p.drawString(140, y, "Category")
-    p.drawString(320, y, "Note")
-    p.drawRightString(width - 40, y, "Amount (₵)")
-    p.line(35, y-3, width-35, y-3)
-    y -= 14
-    p.setFont("Helvetica", 9)
-
-    for e in expenses:
-        if y < 60:
-            p.showPage()
-            y = height - 40
-        p.drawString(40, y, e.timestamp.strftime("%Y-%m-%d %H:%M"))
-        p.drawString(140, y, e.category.name if e.category else "—")
-        p.drawString(320, y, (e.note[:30] + '...') if e.note and len(e.note) > 30 else (e.note or "—"))
-        p.drawRightString(width - 40, y, f"{float(e.amount):.2f}")
-        y -= 12
-
-    p.showPage()
-    p.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="expenses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"'
-    return response
+    from reports.exports import export_filename, pdf_response, report_filters, write_expenses_pdf
 
+    f = report_filters(request.GET)
+    return pdf_response(
+        write_expenses_pdf, export_filename("expenses", "pdf", f["start"], f["end"]),
+        start=f["start"], end=f["end"], category=f["category"], cashier=f["cashier"],
+    )
@@ -1,5 +1,27 @@
 from django.contrib import admin
-from .models import BankAccount, BankTransaction
+from django.db import transaction
+from django.db.models import Min
+from .models import BankAccount, BankTransaction, BankAccountMonthSnapshot
+from .services import reflow_account
 
 admin.site.register(BankAccount)
-admin.site.register(BankTransaction)
+
+
+@admin.register(BankTransaction)
+class BankTransactionAdmin(admin.ModelAdmin):
+    list_display = ('date', 'account', 'tx_type', 'title', 'amount', 'balance_after')
+    list_filter = ('account', 'tx_type')
+
+    def delete_queryset(self, request, queryset):
+        # bulk deletes skip BankTransaction.delete(), so re-flow the affected accounts here
+        with transaction.atomic():
+            affected = dict(queryset.order_by().values_list("account_id").annotate(first=Min("date")))
+            super().delete_queryset(request, queryset)
+            for account_id, first in affected.items():
+                reflow_account(account_id, first)
+
+
+@admin.register(BankAccountMonthSnapshot)
+class BankAccountMonthSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('account', 'month', 'opening_balance', 'credits', 'debits', 'closing_balance')
+    list_filter = ('account',)
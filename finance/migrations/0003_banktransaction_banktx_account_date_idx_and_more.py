@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_alter_bankaccount_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['account', 'date', 'id'], name='banktx_account_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='banktransaction',
+            index=models.Index(fields=['account', 'tx_type', 'date'], name='banktx_account_type_idx'),
+        ),
+    ]
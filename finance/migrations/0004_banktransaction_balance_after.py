@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:28
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_banktransaction_banktx_account_date_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banktransaction',
+            name='balance_after',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.CreateModel(
+            name='BankAccountMonthSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('opening_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('credits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('debits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_snapshots', to='finance.bankaccount')),
+            ],
+            options={
+                'ordering': ['-month'],
+                'constraints': [models.UniqueConstraint(fields=('account', 'month'), name='bank_month_snapshot_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    BankAccount = apps.get_model("finance", "BankAccount")
+    BankTransaction = apps.get_model("finance", "BankTransaction")
+    BankAccountMonthSnapshot = apps.get_model("finance", "BankAccountMonthSnapshot")
+
+    for account in BankAccount.objects.all():
+        running = account.opening_balance or Decimal("0.00")
+        months = {}
+        changed = []
+        for tx in BankTransaction.objects.filter(account=account).order_by("date", "id").iterator(chunk_size=1000):
+            m = months.setdefault(date(tx.date.year, tx.date.month, 1), [Decimal("0.00"), Decimal("0.00")])
+            if tx.tx_type == "credit":
+                m[0] += tx.amount
+                running += tx.amount
+            else:
+                m[1] += tx.amount
+                running -= tx.amount
+            tx.balance_after = running
+            changed.append(tx)
+        BankTransaction.objects.bulk_update(changed, ["balance_after"], batch_size=1000)
+
+        opening = account.opening_balance or Decimal("0.00")
+        snapshots = []
+        for month in sorted(months):
+            credits, debits = months[month]
+            closing = opening + credits - debits
+            snapshots.append(BankAccountMonthSnapshot(
+                account=account, month=month, opening_balance=opening,
+                credits=credits, debits=debits, closing_balance=closing,
+            ))
+            opening = closing
+        BankAccountMonthSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("finance", "0004_banktransaction_balance_after"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_backfill_balance_after'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='banktransaction',
+            name='banktx_account_type_idx',
+        ),
+    ]
@@ -1,7 +1,32 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from decimal import Decimal
 
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _tx_sum(tx_type):
+    return Coalesce(
+        Sum(Case(
+            When(transactions__tx_type=tx_type, then=F("transactions__amount")),
+            default=Value(Decimal("0.00")),
+            output_field=MONEY,
+        )),
+        Value(Decimal("0.00")),
+        output_field=MONEY,
+    )
+
+
+class BankAccountQuerySet(models.QuerySet):
+    def with_balances(self):
+        """credits, debits and balance (opening + credits - debits) per account, in one grouped query."""
+        return self.annotate(credits=_tx_sum("credit"), debits=_tx_sum("debit")).annotate(
+            balance=models.ExpressionWrapper(F("opening_balance") + F("credits") - F("debits"), output_field=MONEY)
+        )
+
+
 class BankAccount(models.Model):
     name = models.CharField(max_length=100)                 # e.g. Ecobank, MoMo, Cash Box
     account_number = models.CharField(max_length=50, blank=True)
@@ -10,9 +35,23 @@ class BankAccount(models.Model):
     is_active = models.BooleanField(default=True)
     notes = models.TextField(blank=True)
 
+    objects = BankAccountQuerySet.as_manager()
+
     class Meta:
         ordering = ["-is_active", "name"]
 
+    def save(self, *args, **kwargs):
+        from .services import reflow_account
+
+        previous = None
+        if self.pk:
+            previous = BankAccount.objects.filter(pk=self.pk).values_list("opening_balance", flat=True).first()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if previous is not None and previous != self.opening_balance:
+                # every running balance starts from the opening balance
+                reflow_account(self.pk)
+
     def __str__(self):
         label = self.bank_name or "Account"
         return f"{self.name} ({label})"
@@ -31,8 +70,61 @@ class BankTransaction(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # running balance of the account after this row, in (date, id) order; kept by finance.services
+    balance_after = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"), editable=False)
+
     class Meta:
         ordering = ["-date", "-id"]
+        indexes = [
+            # account statement (newest first), running balances and the month range; the
+            # month totals split credit/debit with filter= in the same pass, not by tx_type index
+            models.Index(fields=["account", "date", "id"], name="banktx_account_date_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .services import reflow_account
+
+        previous = None
+        if self.pk:
+            previous = BankTransaction.objects.filter(pk=self.pk).values_list("account_id", "date").first()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if previous and previous[0] != self.account_id:
+                reflow_account(previous[0], previous[1])
+                reflow_account(self.account_id, self.date)
+            else:
+                reflow_account(self.account_id, min(self.date, previous[1]) if previous else self.date)
+            self.refresh_from_db(fields=["balance_after"])
+
+    def delete(self, *args, **kwargs):
+        from .services import reflow_account
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            reflow_account(self.account_id, self.date)
+        return result
 
     def __str__(self):
         return f"{self.account.name} - {self.tx_type} - ₵{self.amount}"
+
+
+class BankAccountMonthSnapshot(models.Model):
+    """
+    Opening/closing balance and totals of one account for one calendar month.
+    Rebuilt by finance.services.reflow_account whenever a transaction in or before the month changes.
+    """
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name="month_snapshots")
+    month = models.DateField()  # first day of the month
+    opening_balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    credits = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    debits = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    closing_balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(fields=["account", "month"], name="bank_month_snapshot_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.account.name} {self.month:%Y-%m}: ₵{self.closing_balance}"
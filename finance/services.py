@@ -0,0 +1,118 @@
+# finance/services.py
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import BankAccount, BankAccountMonthSnapshot, BankTransaction
+
+ZERO = Decimal("0.00")
+BATCH = 1000
+
+
+def month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def _signed(tx_type, amount):
+    return amount if tx_type == "credit" else -amount
+
+
+def balance_before(account, day):
+    """Balance at the start of `day`: the last balance_after strictly before it, else the opening balance."""
+    last = (
+        BankTransaction.objects.filter(account=account, date__lt=day)
+        .order_by("-date", "-id")
+        .values_list("balance_after", flat=True)
+        .first()
+    )
+    return last if last is not None else (account.opening_balance or ZERO)
+
+
+def current_balance(account):
+    """Balance after the newest transaction (one index lookup on (account, date, id))."""
+    last = (
+        BankTransaction.objects.filter(account=account)
+        .order_by("-date", "-id")
+        .values_list("balance_after", flat=True)
+        .first()
+    )
+    return last if last is not None else (account.opening_balance or ZERO)
+
+
+@transaction.atomic
+def reflow_account(account_id, from_date=None):
+    """
+    Recompute balance_after for every transaction of an account dated from_date onward
+    (all of them when from_date is None) and rebuild the month snapshots from that month on.
+    Rows before from_date are untouched, so an insert/edit/delete only pays for the tail.
+    """
+    # serialise writers of the same account
+    account = BankAccount.objects.select_for_update().get(id=account_id)
+
+    if from_date is None:
+        start_balance = account.opening_balance or ZERO
+        tail = BankTransaction.objects.filter(account=account)
+    else:
+        # whole months, so the first rebuilt snapshot is complete
+        from_date = month_start(from_date)
+        start_balance = balance_before(account, from_date)
+        tail = BankTransaction.objects.filter(account=account, date__gte=from_date)
+    running = start_balance
+
+    changed = []
+    months = {}
+    for tx in tail.order_by("date", "id").only("id", "date", "tx_type", "amount", "balance_after").iterator(chunk_size=BATCH):
+        m = months.setdefault(month_start(tx.date), {"credits": ZERO, "debits": ZERO})
+        m["credits" if tx.tx_type == "credit" else "debits"] += tx.amount
+        running += _signed(tx.tx_type, tx.amount)
+        if tx.balance_after != running:
+            tx.balance_after = running
+            changed.append(tx)
+        if len(changed) >= BATCH:
+            BankTransaction.objects.bulk_update(changed, ["balance_after"])
+            changed = []
+    if changed:
+        BankTransaction.objects.bulk_update(changed, ["balance_after"])
+
+    # snapshots: one row per month that has transactions
+    stale = BankAccountMonthSnapshot.objects.filter(account=account)
+    if from_date is not None:
+        stale = stale.filter(month__gte=from_date)
+    stale.delete()
+
+    opening = start_balance
+    snapshots = []
+    for month in sorted(months):
+        m = months[month]
+        closing = opening + m["credits"] - m["debits"]
+        snapshots.append(BankAccountMonthSnapshot(
+            account=account, month=month,
+            opening_balance=opening, credits=m["credits"], debits=m["debits"], closing_balance=closing,
+        ))
+        opening = closing
+    BankAccountMonthSnapshot.objects.bulk_create(snapshots, batch_size=BATCH)
+
+
+def month_figures(account, month):
+    """
+    Opening/closing balance and credits/debits for one month, read from its snapshot.
+    Months without transactions carry the previous closing balance forward.
+    """
+    month = month_start(month)
+    snap = BankAccountMonthSnapshot.objects.filter(account=account, month=month).first()
+    if snap:
+        return {
+            "opening": snap.opening_balance,
+            "closing": snap.closing_balance,
+            "credits": snap.credits,
+            "debits": snap.debits,
+        }
+    prev = (
+        BankAccountMonthSnapshot.objects.filter(account=account, month__lt=month)
+        .order_by("-month")
+        .values_list("closing_balance", flat=True)
+        .first()
+    )
+    balance = prev if prev is not None else (account.opening_balance or ZERO)
+    return {"opening": balance, "closing": balance, "credits": ZERO, "debits": ZERO}
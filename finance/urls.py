@@ -5,6 +5,7 @@ app_name = "finance"
 
 urlpatterns = [
     path("", views.account_list, name="account_list"),
+    path("api/balances/", views.account_balances_json, name="account_balances_json"),
     path("account/add/", views.account_create, name="account_create"),
     path("account/<int:account_id>/edit/", views.account_edit, name="account_edit"),
 
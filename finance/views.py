@@ -1,46 +1,63 @@
 from datetime import date
 from calendar import monthrange
 from decimal import Decimal
+from urllib.parse import urlencode
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q, Sum
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 
+from coldstore.pagination import keyset_page, parse_per_page
 from users.utils import has_any_group
 from .models import BankAccount, BankTransaction
 from .forms import BankAccountForm, BankTransactionForm
+from .services import current_balance, month_figures
+
+
+def _account_rows():
+    """Every account with its credits/debits/balance plus the grand total, from one query."""
+    accounts = BankAccount.objects.with_balances().order_by("-is_active", "name")
+    rows = [
+        {"account": a, "credits": a.credits, "debits": a.debits, "balance": a.balance}
+        for a in accounts
+    ]
+    total_balance = sum((r["balance"] for r in rows), Decimal("0.00"))
+    return rows, total_balance
 
 
 @login_required
 @has_any_group("Admin", "Accountant", "Staff")
 def account_list(request):
-    accounts = BankAccount.objects.all().order_by("-is_active", "name")
-
-    rows = []
-    total_balance = Decimal("0.00")
-
-    for a in accounts:
-        credits = a.transactions.filter(tx_type="credit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
-        debits  = a.transactions.filter(tx_type="debit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
-        opening = a.opening_balance or Decimal("0.00")
-
-        balance = opening + credits - debits
-        total_balance += balance
-
-        rows.append({
-            "account": a,
-            "credits": credits,
-            "debits": debits,
-            "balance": balance,
-        })
-
+    rows, total_balance = _account_rows()
     return render(request, "finance/account_list.html", {
         "rows": rows,
         "total_balance": total_balance,
     })
 
 
+@login_required
+@has_any_group("Admin", "Accountant", "Staff")
+def account_balances_json(request):
+    rows, total_balance = _account_rows()
+    return JsonResponse({
+        "accounts": [
+            {
+                "id": r["account"].id,
+                "name": r["account"].name,
+                "bank_name": r["account"].bank_name,
+                "is_active": r["account"].is_active,
+                "credits": f"{r['credits']:.2f}",
+                "debits": f"{r['debits']:.2f}",
+                "balance": f"{r['balance']:.2f}",
+            }
+            for r in rows
+        ],
+        "total_balance": f"{total_balance:.2f}",
+    })
+
+
 @login_required
 @has_any_group("Admin", "Accountant")  # you can allow Staff too if you want
 def account_create(request):
@@ -82,80 +99,116 @@ def account_edit(request, account_id):
     })
 
 
+def _int_param(value, default, lo, hi):
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return default
+    return n if lo <= n <= hi else default
+
+
+def _date_param(value):
+    try:
+        return date.fromisoformat((value or "").strip())
+    except ValueError:
+        return None
+
+
 @login_required
 @has_any_group("Admin", "Accountant", "Staff")
 def account_detail(request, account_id):
     account = get_object_or_404(BankAccount, id=account_id)
 
-    # Defaults: current month
-    y = int(request.GET.get("y", date.today().year))
-    m = int(request.GET.get("m", date.today().month))
+    # Defaults: current month (bad ?y / ?m fall back to it instead of erroring)
+    today = date.today()
+    y = _int_param(request.GET.get("y"), today.year, 1, 9999)
+    m = _int_param(request.GET.get("m"), today.month, 1, 12)
     last_day = monthrange(y, m)[1]
     start_month = date(y, m, 1)
     end_month = date(y, m, last_day)
 
     # Extra filters
-    date_from = request.GET.get("from", "")
-    date_to = request.GET.get("to", "")
+    date_from = _date_param(request.GET.get("from"))
+    date_to = _date_param(request.GET.get("to"))
     tx_type = request.GET.get("type", "")  # credit/debit
+    if tx_type not in ("credit", "debit"):
+        tx_type = ""
     q = request.GET.get("q", "").strip()
+    per_page = parse_per_page(request.GET.get("per_page"), default=25)
 
     # Base queryset: month range
-    tx = account.transactions.filter(date__range=(start_month, end_month))
+    month_tx = account.transactions.filter(date__range=(start_month, end_month))
 
-    # Apply extra filters
+    # Extra filters as one Q, so the same rows can be totalled with filter=
+    shown = Q()
     if date_from:
-        tx = tx.filter(date__gte=date_from)
+        shown &= Q(date__gte=date_from)
     if date_to:
-        tx = tx.filter(date__lte=date_to)
-    if tx_type in ("credit", "debit"):
-        tx = tx.filter(tx_type=tx_type)
+        shown &= Q(date__lte=date_to)
+    if tx_type:
+        shown &= Q(tx_type=tx_type)
     if q:
-        tx = tx.filter(
+        shown &= (
             Q(title__icontains=q) |
             Q(reference__icontains=q) |
             Q(notes__icontains=q)
         )
 
-    tx = tx.order_by("-date", "-id")
+    # Month totals and totals for the displayed (filtered) list, in one pass over the month
+    credit, debit = Q(tx_type="credit"), Q(tx_type="debit")
+    totals = month_tx.aggregate(
+        month_credits=Sum("amount", filter=credit),
+        month_debits=Sum("amount", filter=debit),
+        total_credits=Sum("amount", filter=shown & credit),
+        total_debits=Sum("amount", filter=shown & debit),
+    )
+    totals = {k: v or Decimal("0.00") for k, v in totals.items()}
+    month_net = totals["month_credits"] - totals["month_debits"]
+
+    # Opening/closing from the month snapshot; current balance from the newest row's balance_after
+    month = month_figures(account, start_month)
+    balance_now = current_balance(account)
+
+    page_obj = keyset_page(
+        month_tx.filter(shown),
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=per_page,
+        fields=("date", "id"),
+    )
 
     # Form for adding transaction
     tx_form = BankTransactionForm()
 
-    # Monthly summary (month only, not extra filters)
-    month_tx = account.transactions.filter(date__range=(start_month, end_month))
-    month_credits = month_tx.filter(tx_type="credit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
-    month_debits  = month_tx.filter(tx_type="debit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
-    month_net = month_credits - month_debits
-
-    # Totals (account overall)
-    all_credits = account.transactions.filter(tx_type="credit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
-    all_debits  = account.transactions.filter(tx_type="debit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
-    opening = account.opening_balance or Decimal("0.00")
-    current_balance = opening + all_credits - all_debits
-
-    # Totals for currently displayed list (filtered tx)
-    total_credits = tx.filter(tx_type="credit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
-    total_debits  = tx.filter(tx_type="debit").aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
+    filters = {
+        "y": y, "m": m,
+        "from": date_from.isoformat() if date_from else "",
+        "to": date_to.isoformat() if date_to else "",
+        "type": tx_type, "q": q, "per_page": per_page,
+    }
 
     return render(request, "finance/account_detail.html", {
         "account": account,
-        "transactions": tx,
+        "transactions": page_obj.object_list,
+        "page_obj": page_obj,
+        "filter_query": urlencode({k: v for k, v in filters.items() if v}),
         "tx_form": tx_form,
 
         "y": y, "m": m,
-        "date_from": date_from,
-        "date_to": date_to,
+        "date_from": filters["from"],
+        "date_to": filters["to"],
         "tx_type": tx_type,
         "q": q,
 
-        "current_balance": current_balance,
-        "total_credits": total_credits,
-        "total_debits": total_debits,
+        "current_balance": balance_now,
+        "total_credits": totals["total_credits"],
+        "total_debits": totals["total_debits"],
 
-        "month_credits": month_credits,
-        "month_debits": month_debits,
+        "month_credits": totals["month_credits"],
+        "month_debits": totals["month_debits"],
         "month_net": month_net,
+        "month_opening": month["opening"],
+        "month_closing": month["closing"],
     })
 
 
@@ -0,0 +1,98 @@
+# inventory/catalog.py
+"""
+Point-of-sale catalog snapshot: every product with its retail/wholesale price and the
+active weight sizes of boxed products, as the POS screen needs them.
+
+The snapshot is built once and kept in the shared cache (settings.CACHES, so every worker
+sees the same version) under a versioned key together with its serialised JSON and an ETag.
+inventory.models bumps the version whenever a Product or ProductWeightPrice is saved or
+deleted (stock-only saves excepted), so a stale snapshot is never read again and opening
+the POS screen costs no catalog queries in between. The version key never expires; if it
+goes missing anyway it restarts at a fresh generation, not at one an old snapshot has.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+CACHE_TIMEOUT = 60 * 60 * 24
+VERSION_KEY = "pos_catalog:v"
+
+# Product.save(update_fields=...) touching only these does not change the catalog
+STOCK_FIELDS = frozenset({"quantity", "boxes_in_stock", "box_remaining_kg"})
+
+
+def _new_generation():
+    # later than any generation handed out before, so no old snapshot can match it
+    return time.time_ns()
+
+
+def invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # not cached yet (or evicted): start a new generation
+        cache.set(VERSION_KEY, _new_generation(), None)
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _new_generation(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _build():
+    from .models import Product, ProductWeightPrice
+
+    products = {}
+    product_choices = []
+    for pid, name, is_weighted, retail, wholesale in (
+        Product.objects.order_by("id").values_list("id", "name", "is_weighted", "unit_price", "wholesale_price")
+    ):
+        products[str(pid)] = {
+            "is_weighted": bool(is_weighted),
+            "retail_price": float(retail or 0),
+            "wholesale_price": float(wholesale or 0),
+        }
+        product_choices.append((pid, name))
+
+    weights = {}
+    weight_choices = []
+    for wid, pid, name, kg, retail, wholesale in (
+        ProductWeightPrice.objects.filter(is_active=True)
+        .order_by("weight_kg", "id")
+        .values_list("id", "product_id", "product__name", "weight_kg", "retail_price", "wholesale_price")
+    ):
+        weights.setdefault(str(pid), []).append({
+            "id": wid,
+            "label": f"{kg:g}kg",
+            "weight_kg": float(kg),
+            "retail_price": float(retail),
+            "wholesale_price": float(wholesale),
+        })
+        # same text as ProductWeightPrice.__str__
+        weight_choices.append((wid, f"{name} - {kg}kg"))
+
+    body = json.dumps({"products": products, "weights": weights}, separators=(",", ":"))
+    return {
+        "json": body,
+        "etag": '"%s"' % hashlib.md5(body.encode()).hexdigest(),
+        "product_choices": product_choices,
+        "weight_choices": weight_choices,
+    }
+
+
+def get_catalog():
+    """
+    The current snapshot: {"json", "etag", "product_choices", "weight_choices"}.
+    Two cache reads in the steady state, two queries after a change.
+    """
+    key = f"pos_catalog:{_version()}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _build()
+        cache.set(key, snapshot, CACHE_TIMEOUT)
+    return snapshot
@@ -41,6 +41,9 @@ class ProductForm(forms.ModelForm):
                 self.add_error("boxes_in_stock", "Boxes in stock cannot be negative.")
             if br < 0:
                 self.add_error("box_remaining_kg", "Box remaining kg cannot be negative.")
+            # only when one of them is being changed, so an old over-full row can still be edited
+            if box_weight > 0 and br > box_weight and {"box_weight_kg", "box_remaining_kg"} & set(self.changed_data):
+                self.add_error("box_remaining_kg", "Box remaining kg cannot be more than the box weight.")
 
             # optional: you can auto-zero unit quantity to avoid confusion
             # cleaned["quantity"] = 0
@@ -104,6 +107,38 @@ class ProductWeightPriceForm(forms.ModelForm):
         return w
 
 
+class ProductImportForm(ProductForm):
+    """
+    One row of a product sheet (inventory/imports.py): ProductForm's rules, with the
+    category given by name and resolved in bulk instead of one lookup per row.
+    """
+    category = forms.CharField(required=False, max_length=100)
+
+    class Meta(ProductForm.Meta):
+        fields = [f for f in ProductForm.Meta.fields if f not in ("category", "image")]
+
+
+class WeightPriceImportForm(ProductWeightPriceForm):
+    """One row of a weight-price sheet; the product comes from the row's SKU."""
+
+    class Meta(ProductWeightPriceForm.Meta):
+        fields = [f for f in ProductWeightPriceForm.Meta.fields if f != "product"]
+
+
+class ImportUploadForm(forms.Form):
+    KINDS = [("products", "Products"), ("weight_prices", "Weight prices")]
+
+    kind = forms.ChoiceField(choices=KINDS)
+    file = forms.FileField(help_text="CSV or XLSX with a header row (the export format).")
+    dry_run = forms.BooleanField(required=False, initial=True, label="Dry run (check only, change nothing)")
+
+    def clean_file(self):
+        f = self.cleaned_data["file"]
+        if not f.name.lower().endswith((".csv", ".xlsx")):
+            raise forms.ValidationError("Upload a .csv or .xlsx file.")
+        return f
+
+
 # from django import forms
 # from .models import Product, StockEntry, StockOut
 
@@ -0,0 +1,340 @@
+# inventory/imports.py
+"""
+Bulk import of product and weight-price sheets (CSV or XLSX, the layout of the
+reports.exports products / weight prices export).
+
+Rows are read as a stream and handled CHUNK_SIZE at a time: one query loads the existing
+rows the chunk refers to (products by SKU, weight prices by (product, weight_kg)), every
+row is validated by the same form rules as the UI, and the chunk is written with one
+bulk_create and one bulk_update. The whole import runs in one transaction. It is rolled
+back when any row is invalid or on a dry run, so the report always describes exactly
+what applying the sheet does.
+
+Stock columns (quantity, boxes_in_stock, box_remaining_kg) only set the opening stock of
+new products; stock of existing products moves through stock in/out and sales only.
+"""
+import csv
+import io
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .catalog import STOCK_FIELDS, invalidate as invalidate_catalog
+from .forms import ProductImportForm, WeightPriceImportForm
+from .models import Category, Product, ProductWeightPrice
+
+try:
+    import openpyxl  # type: ignore
+    OPENPYXL_AVAILABLE = True
+except Exception:
+    openpyxl = None
+    OPENPYXL_AVAILABLE = False
+
+CHUNK_SIZE = 1000
+UPDATE_BATCH = 200
+MAX_REPORTED_ERRORS = 200
+
+PRODUCT_COLUMNS = [
+    "track_method", "name", "category", "unit_price", "wholesale_price", "is_weighted",
+    "box_weight_kg", "boxes_in_stock", "box_remaining_kg", "quantity", "min_quantity_alert",
+]
+PRODUCT_UPDATE_FIELDS = [
+    "track_method", "name", "category", "unit_price", "wholesale_price", "is_weighted",
+    "box_weight_kg", "min_quantity_alert",
+]
+WEIGHT_PRICE_COLUMNS = ["weight_kg", "retail_price", "wholesale_price", "is_active"]
+WEIGHT_PRICE_UPDATE_FIELDS = ["retail_price", "wholesale_price", "is_active"]
+BOOLEAN_COLUMNS = {"is_weighted", "is_active"}
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+
+class SheetError(ValueError):
+    """The file itself cannot be read (wrong format, no header, no SKU column)."""
+
+
+class _Rollback(Exception):
+    pass
+
+
+class ImportReport:
+    def __init__(self, kind, dry_run):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors = []  # (row number, [messages]), the first MAX_REPORTED_ERRORS
+        self.new_categories = []
+        self.applied = False
+
+    def error(self, line, *messages):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, list(messages)))
+
+
+# --------------------------
+# Reading
+# --------------------------
+def _column(header):
+    """'Box Weight (kg)' -> 'box_weight_kg'"""
+    return re.sub(r"\W+", "_", str(header or "").strip().lower()).strip("_")
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)  # XLSX stores 1001 as 1001.0
+    return value.strip() if isinstance(value, str) else value
+
+
+def _records(header, rows, first_line):
+    columns = [_column(h) for h in header]
+    if "sku" not in columns:
+        raise SheetError("The header row has no SKU column.")
+    for line, values in enumerate(rows, start=first_line):
+        row = {col: _cell(v) for col, v in zip(columns, values) if col}
+        if any(v != "" for v in row.values()):
+            yield line, row
+
+
+def read_rows(fileobj, filename):
+    """Yield (row number, {column: value}) from a CSV or XLSX upload, one row at a time."""
+    if filename.lower().endswith(".xlsx"):
+        if not OPENPYXL_AVAILABLE:
+            raise SheetError("XLSX import needs openpyxl; upload a CSV instead.")
+        try:
+            wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+        except Exception:
+            raise SheetError("Could not read the XLSX file.")
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                raise SheetError("The sheet is empty.")
+            yield from _records(header, rows, 2)
+        finally:
+            wb.close()
+        return
+
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            raise SheetError("The file is empty.")
+        yield from _records(header, reader, 2)
+    except UnicodeDecodeError:
+        raise SheetError("The CSV file is not UTF-8 text.")
+    finally:
+        text.detach()
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _bool(value):
+    return value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+
+
+def _decimal(value):
+    """Decimal of a cell, None when blank or not a number."""
+    try:
+        d = Decimal(str(value))
+    except InvalidOperation:
+        return None
+    return d if d.is_finite() else None
+
+
+def _form_data(row, columns, base, skip=()):
+    """Current values of `base` overlaid with the row's non-blank cells."""
+    data = {col: getattr(base, col) for col in columns if col != "category"}
+    for col in columns:
+        if col in skip or row.get(col, "") == "":
+            continue
+        data[col] = _bool(row[col]) if col in BOOLEAN_COLUMNS else row[col]
+    return data
+
+
+def _unchanged(obj, row, fields):
+    """True when every non-blank cell already equals the stored value."""
+    for f in fields:
+        value = row.get(f, "")
+        if value == "":
+            continue
+        stored = getattr(obj, f)
+        if (_bool(value) if isinstance(stored, bool) else _decimal(value)) != stored:
+            return False
+    return True
+
+
+def _form_errors(form):
+    return [f"{field}: {msg}" if field != "__all__" else msg for field, msgs in form.errors.items() for msg in msgs]
+
+
+def _run(kind, rows, dry_run, apply_chunk):
+    report = ImportReport(kind, dry_run)
+    try:
+        with transaction.atomic():
+            seen = {}
+            for chunk in _chunks(rows):
+                apply_chunk(chunk, report, seen)
+            if dry_run or report.error_count:
+                raise _Rollback
+            # bulk writes send no post_save: refresh the POS catalog once
+            transaction.on_commit(invalidate_catalog)
+    except _Rollback:
+        pass
+    else:
+        report.applied = True
+    return report
+
+
+# --------------------------
+# Products (keyed by SKU)
+# --------------------------
+def import_products(rows, *, user=None, dry_run=False):
+    """Create / update products from (row number, row) pairs. Returns an ImportReport."""
+    categories = {c.name.lower(): c for c in Category.objects.all()}
+    category_names = {c.id: c.name for c in categories.values()}
+
+    def category_for(name, report):
+        if not name:
+            return None
+        category = categories.get(name.lower())
+        if category is None:
+            category = categories[name.lower()] = Category.objects.create(name=name)
+            report.new_categories.append(name)
+        return category
+
+    def apply_chunk(chunk, report, seen):
+        skus = {str(row.get("sku", "")) for _, row in chunk} - {""}
+        existing = {}
+        for p in Product.objects.filter(sku__in=skus):
+            existing.setdefault(p.sku, []).append(p)
+
+        creates, updates = [], []
+        for line, row in chunk:
+            report.rows += 1
+            sku = str(row.get("sku", ""))
+            if not sku:
+                report.error(line, "SKU is required.")
+                continue
+            if sku in seen:
+                report.error(line, f"SKU {sku} already appears on row {seen[sku]}.")
+                continue
+            seen[sku] = line
+            matches = existing.get(sku, [])
+            if len(matches) > 1:
+                report.error(line, f"SKU {sku} matches {len(matches)} products; fix the duplicates first.")
+                continue
+
+            product = matches[0] if matches else None
+            base = product or Product(sku=sku)
+            data = _form_data(row, PRODUCT_COLUMNS, base, skip=STOCK_FIELDS if product else ())
+            data["sku"] = sku
+            data["category"] = row["category"] if row.get("category", "") != "" else category_names.get(base.category_id, "")
+            before = {f: getattr(base, f"{f}_id" if f == "category" else f) for f in PRODUCT_UPDATE_FIELDS}
+
+            form = ProductImportForm(data, instance=base)
+            if not form.is_valid():
+                report.error(line, *_form_errors(form))
+                continue
+            obj = form.save(commit=False)
+            obj.category = category_for(form.cleaned_data["category"], report)
+
+            if product is None:
+                obj.created_by = user
+                creates.append(obj)
+            elif any(before[f] != getattr(obj, f"{f}_id" if f == "category" else f) for f in PRODUCT_UPDATE_FIELDS):
+                updates.append(obj)
+            else:
+                report.unchanged += 1
+
+        report.created += len(creates)
+        report.updated += len(updates)
+        if report.error_count:
+            return  # rolled back anyway, skip the writes
+        Product.objects.bulk_create(creates, batch_size=CHUNK_SIZE)
+        Product.objects.bulk_update(updates, PRODUCT_UPDATE_FIELDS, batch_size=UPDATE_BATCH)
+
+    return _run("products", rows, dry_run, apply_chunk)
+
+
+# --------------------------
+# Weight prices (keyed by product SKU + weight_kg)
+# --------------------------
+def import_weight_prices(rows, *, dry_run=False):
+    """Create / update weight prices from (row number, row) pairs. Returns an ImportReport."""
+
+    def apply_chunk(chunk, report, seen):
+        skus = {str(row.get("sku", "")) for _, row in chunk} - {""}
+        products = {}
+        for p in Product.objects.filter(sku__in=skus).only("id", "sku", "name", "is_weighted"):
+            products.setdefault(p.sku, []).append(p)
+        prices = {
+            (wp.product_id, wp.weight_kg): wp
+            for wp in ProductWeightPrice.objects.filter(product__in=[ps[0] for ps in products.values() if len(ps) == 1])
+        }
+
+        creates, updates = [], []
+        for line, row in chunk:
+            report.rows += 1
+            sku = str(row.get("sku", ""))
+            matches = products.get(sku, [])
+            if len(matches) != 1:
+                report.error(line, f"SKU {sku or '(blank)'} matches {len(matches) or 'no'} products.")
+                continue
+            product = matches[0]
+            if not product.is_weighted:
+                report.error(line, f"{product.name} is not configured for weight-based sales.")
+                continue
+
+            key = (product.id, _decimal(row.get("weight_kg")))
+            if key[1] is not None:
+                if key in seen:
+                    report.error(line, f"{product.name} {row['weight_kg']}kg already appears on row {seen[key]}.")
+                    continue
+                seen[key] = line
+
+            current = prices.get(key)
+            if current is not None and _unchanged(current, row, WEIGHT_PRICE_UPDATE_FIELDS):
+                # most rows of a re-imported sheet: stored values are valid, skip the form
+                report.unchanged += 1
+                continue
+
+            base = current or ProductWeightPrice(product=product)
+            before = {f: getattr(base, f) for f in WEIGHT_PRICE_UPDATE_FIELDS}
+            form = WeightPriceImportForm(_form_data(row, WEIGHT_PRICE_COLUMNS, base), instance=base)
+            if not form.is_valid():
+                report.error(line, *_form_errors(form))
+                continue
+            obj = form.save(commit=False)
+
+            if current is None:
+                creates.append(obj)
+            elif any(before[f] != getattr(obj, f) for f in WEIGHT_PRICE_UPDATE_FIELDS):
+                updates.append(obj)
+            else:
+                report.unchanged += 1
+
+        report.created += len(creates)
+        report.updated += len(updates)
+        if report.error_count:
+            return
+        ProductWeightPrice.objects.bulk_create(creates, batch_size=CHUNK_SIZE)
+        ProductWeightPrice.objects.bulk_update(updates, WEIGHT_PRICE_UPDATE_FIELDS, batch_size=UPDATE_BATCH)
+
+    return _run("weight_prices", rows, dry_run, apply_chunk)
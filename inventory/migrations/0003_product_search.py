@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+from inventory import search
+
+
+def install_search(apps, schema_editor):
+    search.install(schema_editor)
+
+
+def uninstall_search(apps, schema_editor):
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_product_product_low_stock_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['sku'], name='product_sku_idx'),
+        ),
+        # pg_trgm GIN indexes on PostgreSQL, FTS5 table + triggers on SQLite
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, Q, Sum, Value, When
+from django.db.models.functions import Cast
 from django.contrib.auth.models import User
 from decimal import Decimal
 from django.utils import timezone
@@ -9,6 +11,62 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+MONEY = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def available_kg_expr():
+    """Product.available_weight_kg() as a database expression (same box rule)."""
+    boxes, bw, br = F("boxes_in_stock"), F("box_weight_kg"), F("box_remaining_kg")
+    opened = (boxes - 1) * bw
+    return Case(
+        When(Q(is_weighted=False) | Q(boxes_in_stock__lte=0) | Q(box_weight_kg__lte=0), then=Value(Decimal("0.00"))),
+        # remainder not initialised yet (or negative): the current box is full
+        When(box_remaining_kg__lte=0, then=opened + bw),
+        default=opened + br,
+        output_field=MONEY,
+    )
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_available_kg(self):
+        """Annotate available_kg: Product.available_weight_kg() computed in SQL (0 for unit products)."""
+        return self.annotate(available_kg=available_kg_expr())
+
+    def with_stock_status(self):
+        """
+        Annotate available_kg, stock_level (units, or kg for boxed products), stock_value and
+        stock_status ("out" / "low" / "ok"). Boxed products are low when no more than
+        min_quantity_alert boxes' worth of kg is left; unit_price is their price per kg.
+        """
+        weighted = Q(is_weighted=True)
+        qs = self.with_available_kg().annotate(
+            stock_level=Case(When(weighted, then=F("available_kg")), default=Cast("quantity", MONEY), output_field=MONEY),
+        )
+        return qs.annotate(
+            stock_value=ExpressionWrapper(F("stock_level") * F("unit_price"), output_field=MONEY),
+            stock_status=Case(
+                When(weighted & Q(available_kg__lte=0), then=Value("out")),
+                When(weighted & Q(available_kg__lte=F("min_quantity_alert") * F("box_weight_kg")), then=Value("low")),
+                When(weighted, then=Value("ok")),
+                When(quantity__lte=0, then=Value("out")),
+                When(quantity__lte=F("min_quantity_alert"), then=Value("low")),
+                default=Value("ok"),
+                output_field=models.CharField(),
+            ),
+        )
+
+    def stock_counts(self):
+        """Total / low / out / ok counts and total stock value in one conditional aggregate."""
+        agg = self.with_stock_status().aggregate(
+            total=Count("id"),
+            low=Count("id", filter=Q(stock_status="low")),
+            out=Count("id", filter=Q(stock_status="out")),
+            value=Sum("stock_value"),
+        )
+        agg["value"] = agg["value"] or Decimal("0.00")
+        return agg
+
+
 class Product(models.Model):
     TRACK_METHODS = [
         
@@ -32,7 +90,15 @@ class Product(models.Model):
     image = models.ImageField(upload_to='products/', blank=True, null=True)   # <--- NEW
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
-    
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # exact SKU / barcode lookups (inventory/search.py)
+            models.Index(fields=["sku"], name="product_sku_idx"),
+        ]
+
     def available_weight_kg(self):
         """
         If weighted:
@@ -88,9 +154,16 @@ class StockEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        self.product.quantity = self.product.quantity + self.quantity
-        self.product.save()
+        from .services import record_movement
+
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = StockEntry.objects.filter(pk=self.pk).values_list("product_id", "quantity").first()
+            super().save(*args, **kwargs)
+            self.product.quantity = record_movement(
+                product_id=self.product_id, quantity=self.quantity, sign=1, previous=previous
+            )
 
 class StockOut(models.Model):
     """Stock out: sold or disposed"""
@@ -101,11 +174,35 @@ class StockOut(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        self.product.quantity = self.product.quantity - self.quantity
-        if self.product.quantity < 0:
-            self.product.quantity = 0
-        self.product.save()
+        from .services import record_movement
+
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = StockOut.objects.filter(pk=self.pk).values_list("product_id", "quantity").first()
+            super().save(*args, **kwargs)
+            self.product.quantity = record_movement(
+                product_id=self.product_id, quantity=self.quantity, sign=-1, previous=previous
+            )
+
+
+# POS catalog cache invalidation (see inventory/catalog.py)
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import STOCK_FIELDS, invalidate as invalidate_catalog
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductWeightPrice)
+@receiver(post_delete, sender=ProductWeightPrice)
+def catalog_changed(sender, instance, update_fields=None, **kwargs):
+    if sender is Product and update_fields and STOCK_FIELDS.issuperset(update_fields):
+        # stock-only saves (consume_weight on every weighted sale) leave names and prices alone
+        return
+    # after commit, so a snapshot built meanwhile from the old rows is dropped too
+    transaction.on_commit(invalidate_catalog)
 
 
 
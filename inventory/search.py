@@ -0,0 +1,189 @@
+# inventory/search.py
+"""
+Product search on name, SKU and category name, served from an index instead of a
+sequential icontains scan.
+
+- PostgreSQL: pg_trgm GIN indexes on UPPER(name) / UPPER(sku) / UPPER(category name), the
+  exact expression Django emits for icontains, so the same filter becomes an index scan.
+  Typeahead results are ranked by trigram word similarity.
+- SQLite: an FTS5 table (trigram tokenizer, so terms still match anywhere in a word) kept in
+  sync with inventory_product and inventory_category by triggers, ranked by bm25.
+  Terms shorter than three characters cannot use it and fall back to icontains.
+- Anything else: icontains.
+
+An exact SKU (a barcode scan) is answered from product_sku_idx before any of that.
+
+install() is run by migration inventory.0003. On SQLite, a later migration that rebuilds the
+inventory_product table drops its triggers with the old table and must call install() again.
+"""
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "inventory_product_fts"
+TYPEAHEAD_LIMIT = 20
+MIN_TERM = 3  # trigram tokenizer
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS product_name_trgm_idx ON inventory_product USING gin ((UPPER(name::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_sku_trgm_idx ON inventory_product USING gin ((UPPER(sku::text)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS category_name_trgm_idx ON inventory_category USING gin ((UPPER(name::text)) gin_trgm_ops)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS product_name_trgm_idx",
+    "DROP INDEX IF EXISTS product_sku_trgm_idx",
+    "DROP INDEX IF EXISTS category_name_trgm_idx",
+]
+
+_FTS_ROW = (
+    "INSERT INTO inventory_product_fts(rowid, name, sku, category) VALUES ("
+    "new.id, new.name, coalesce(new.sku, ''), "
+    "coalesce((SELECT name FROM inventory_category WHERE id = new.category_id), ''));"
+)
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS inventory_product_fts USING fts5(name, sku, category, tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS inventory_product_fts_ai AFTER INSERT ON inventory_product BEGIN "
+    + _FTS_ROW + " END",
+    "CREATE TRIGGER IF NOT EXISTS inventory_product_fts_ad AFTER DELETE ON inventory_product BEGIN "
+    "DELETE FROM inventory_product_fts WHERE rowid = old.id; END",
+    # stock movements rewrite the row too: only re-index when a searched column changed
+    "CREATE TRIGGER IF NOT EXISTS inventory_product_fts_au AFTER UPDATE OF name, sku, category_id ON inventory_product "
+    "WHEN old.name IS NOT new.name OR old.sku IS NOT new.sku OR old.category_id IS NOT new.category_id BEGIN "
+    "DELETE FROM inventory_product_fts WHERE rowid = old.id; " + _FTS_ROW + " END",
+    "CREATE TRIGGER IF NOT EXISTS inventory_category_fts_au AFTER UPDATE OF name ON inventory_category BEGIN "
+    "UPDATE inventory_product_fts SET category = new.name "
+    "WHERE rowid IN (SELECT id FROM inventory_product WHERE category_id = new.id); END",
+    "DELETE FROM inventory_product_fts",
+    "INSERT INTO inventory_product_fts(rowid, name, sku, category) "
+    "SELECT p.id, p.name, coalesce(p.sku, ''), coalesce(c.name, '') "
+    "FROM inventory_product p LEFT JOIN inventory_category c ON c.id = p.category_id",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS inventory_product_fts_ai",
+    "DROP TRIGGER IF EXISTS inventory_product_fts_ad",
+    "DROP TRIGGER IF EXISTS inventory_product_fts_au",
+    "DROP TRIGGER IF EXISTS inventory_category_fts_au",
+    "DROP TABLE IF EXISTS inventory_product_fts",
+]
+
+# alias -> whether the FTS table exists there
+_fts_ready = {}
+
+
+def install(schema_editor):
+    """Create (or re-create and re-fill) the search index objects for this database."""
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        for sql in POSTGRES_INSTALL:
+            schema_editor.execute(sql)
+    elif connection.vendor == "sqlite":
+        try:
+            with transaction.atomic(using=connection.alias):
+                for sql in SQLITE_INSTALL:
+                    schema_editor.execute(sql)
+        except DatabaseError:
+            # SQLite built without FTS5 / the trigram tokenizer (< 3.34): icontains it is
+            pass
+    _fts_ready.pop(connection.alias, None)
+
+
+def uninstall(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        for sql in POSTGRES_UNINSTALL:
+            schema_editor.execute(sql)
+    elif connection.vendor == "sqlite":
+        for sql in SQLITE_UNINSTALL:
+            schema_editor.execute(sql)
+    _fts_ready.pop(connection.alias, None)
+
+
+def _fts_match(using, text):
+    """FTS5 MATCH expression for `text` (every term, anywhere), or None when FTS can't serve it."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return None
+    if using not in _fts_ready:
+        _fts_ready[using] = FTS_TABLE in connection.introspection.table_names()
+    terms = text.split()
+    if not _fts_ready[using] or not terms or any(len(t) < MIN_TERM for t in terms):
+        return None
+    return " ".join('"%s"' % t.replace('"', '""') for t in terms)
+
+
+def filter_queryset(qs, text):
+    """Narrow a Product queryset to products whose name, SKU or category name contain `text`."""
+    text = text.strip()
+    match = _fts_match(qs.db, text)
+    if match:
+        return qs.filter(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)))
+
+    from .models import Category
+
+    # a subquery on category keeps each branch on its own (trigram) index, no join
+    return qs.filter(
+        Q(name__icontains=text)
+        | Q(sku__icontains=text)
+        | Q(category__in=Category.objects.filter(name__icontains=text).values("id"))
+    )
+
+
+def _results(qs, limit=None):
+    rows = qs.with_available_kg().values(
+        "id", "name", "sku", "category__name", "is_weighted", "quantity", "available_kg",
+        "unit_price", "wholesale_price",
+    )
+    if limit is not None:
+        rows = rows[:limit]
+    return [
+        {
+            "id": r["id"],
+            "name": r["name"],
+            "sku": r["sku"] or "",
+            "category": r["category__name"] or "",
+            "is_weighted": r["is_weighted"],
+            "stock": float(r["available_kg"]) if r["is_weighted"] else r["quantity"],
+            "retail_price": float(r["unit_price"] or 0),
+            "wholesale_price": float(r["wholesale_price"] or 0),
+        }
+        for r in rows
+    ]
+
+
+def search_products(text, limit=TYPEAHEAD_LIMIT):
+    """The `limit` best matches for `text` as JSON-ready dicts, best first."""
+    from .models import Product
+
+    text = (text or "").strip()
+    if not text:
+        return []
+
+    # barcode / SKU scan: one index lookup
+    exact = _results(Product.objects.filter(sku=text).order_by("name"), limit)
+    if exact:
+        return exact
+
+    using = Product.objects.db
+    match = _fts_match(using, text)
+    if match:
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 5.0, 1.0) LIMIT %s",
+                [match, limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        rows = {r["id"]: r for r in _results(Product.objects.filter(id__in=ids))}
+        return [rows[i] for i in ids if i in rows]
+
+    qs = filter_queryset(Product.objects.all(), text)
+    if connections[using].vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        qs = qs.annotate(rank=TrigramWordSimilarity(text, "name")).order_by("-rank", "name")
+    else:
+        qs = qs.annotate(
+            rank=Case(When(name__istartswith=text, then=Value(0)), default=Value(1), output_field=IntegerField())
+        ).order_by("rank", "name")
+    return _results(qs, limit)
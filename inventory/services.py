@@ -1,6 +1,9 @@
 # inventory/services.py
-from decimal import Decimal
-from django.db import transaction
+from decimal import Decimal, ROUND_CEILING
+from typing import NamedTuple
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
 
 from .models import Product
 
@@ -10,6 +13,70 @@ def q2(value) -> Decimal:
     return Decimal(value or "0.00").quantize(Decimal("0.01"))
 
 
+# --------------------------
+# Unit stock movements
+# --------------------------
+def move_stock(*, product_id: int, delta: int) -> int:
+    """
+    Add delta (negative for stock-out) to Product.quantity in the database,
+    clamped at zero, without a read-modify-write in Python.
+    Returns the new balance: a single UPDATE ... RETURNING on PostgreSQL,
+    UPDATE + SELECT elsewhere.
+    """
+    delta = int(delta)
+
+    if connection.vendor == "postgresql":
+        table = connection.ops.quote_name(Product._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET quantity = GREATEST(quantity + %s, 0) WHERE id = %s RETURNING quantity",
+                [delta, product_id],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            raise Product.DoesNotExist(f"Product {product_id} does not exist.")
+        return row[0]
+
+    updated = Product.objects.filter(id=product_id).update(quantity=Greatest(F("quantity") + delta, Value(0)))
+    if not updated:
+        raise Product.DoesNotExist(f"Product {product_id} does not exist.")
+    return Product.objects.filter(id=product_id).values_list("quantity", flat=True).get()
+
+
+def move_stock_bulk(deltas: dict) -> int:
+    """
+    Apply {product_id: delta} to many products in one UPDATE (CASE per id, clamped at zero).
+    Returns the number of rows updated.
+    """
+    deltas = {int(pid): int(d) for pid, d in deltas.items() if d}
+    if not deltas:
+        return 0
+    change = Case(
+        *[When(id=pid, then=Value(d)) for pid, d in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return Product.objects.filter(id__in=deltas).update(quantity=Greatest(F("quantity") + change, Value(0)))
+
+
+@transaction.atomic
+def record_movement(*, product_id: int, quantity: int, sign: int, previous=None) -> int:
+    """
+    Apply a StockEntry (sign=+1) or StockOut (sign=-1) to stock.
+    On edit, pass previous=(product_id, quantity) as saved before, so only the
+    difference is applied (a changed product reverses the old row on the old product).
+    Returns the new balance of product_id.
+    """
+    deltas = {product_id: sign * int(quantity or 0)}
+    if previous is not None:
+        old_product_id, old_quantity = previous
+        deltas[old_product_id] = deltas.get(old_product_id, 0) - sign * int(old_quantity or 0)
+
+    other = {pid: d for pid, d in deltas.items() if pid != product_id}
+    move_stock_bulk(other)
+    return move_stock(product_id=product_id, delta=deltas[product_id])
+
+
 @transaction.atomic
 def receive_weight_boxes(*, product: Product, boxes_received: int, box_weight_kg: Decimal) -> Product:
     """
@@ -43,15 +110,25 @@ def receive_weight_boxes(*, product: Product, boxes_received: int, box_weight_kg
     return product
 
 
-@transaction.atomic
-def consume_weight(*, product: Product, kg_to_sell: Decimal) -> Product:
+class WeightPlan(NamedTuple):
+    """Stock left on a boxed-weight product after a sale (see plan_weight_consumption)."""
+    boxes_in_stock: int
+    box_remaining_kg: Decimal
+    available_kg: Decimal
+
+
+def plan_weight_consumption(product: Product, kg_to_sell: Decimal) -> WeightPlan:
     """
-    Deduct kg using Code B rule:
-    - Deduct from current box (box_remaining_kg)
-    - When it hits 0, decrement boxes_in_stock and move to next full box if any
+    Work out, without touching the product, what selling kg_to_sell leaves in stock.
+    Code B rule: sell from the open box first, a box is only deducted once it is
+    fully used, and the next box then opens full.
+
+    Closed form, O(1) whatever the quantity:
+    left = available - sold
+    boxes = ceil(left / box_weight), open box = left - (boxes - 1) * box_weight
+    Raises ValueError when the product cannot be sold by weight, stock is short or the
+    open box holds more than box_weight_kg (only possible on old or hand-edited rows).
     """
-    product = Product.objects.select_for_update().get(id=product.id)
-
     if not product.is_weighted or product.track_method != "boxed_weight":
         raise ValueError("Product is not configured for boxed-weight sales.")
 
@@ -59,57 +136,66 @@ def consume_weight(*, product: Product, kg_to_sell: Decimal) -> Product:
     if bw <= 0:
         raise ValueError("box_weight_kg is not set.")
 
-    if int(product.boxes_in_stock or 0) <= 0:
+    boxes = int(product.boxes_in_stock or 0)
+    if boxes <= 0:
         raise ValueError("No boxes in stock.")
 
-    kg_left = q2(kg_to_sell)
-    if kg_left <= 0:
-        return product
-
-    # init remaining if not set
+    # an uninitialized open box counts as full
     br = q2(product.box_remaining_kg)
     if br <= 0:
         br = bw
-        product.box_remaining_kg = br
-
-    # check available
-    available = product.available_weight_kg()
-    if kg_left > available:
+    if br > bw:
+        # the formula below would add a box (or leave an over-full one): refuse the bad record
+        raise ValueError(
+            f"{product.name}: open box holds {br}kg, more than the {bw}kg box weight. "
+            "Correct the stock record first."
+        )
+    available = q2((boxes - 1) * bw + br)
+
+    kg = q2(kg_to_sell)
+    if kg <= 0:
+        return WeightPlan(boxes, q2(product.box_remaining_kg), available)
+    if kg > available:
         raise ValueError(f"Not enough kg in stock. Available: {available}kg")
 
-    while kg_left > 0:
-        br = q2(product.box_remaining_kg)
-
-        # if current box empty, move to next box (decrement then refill)
-        if br <= 0:
-            product.boxes_in_stock -= 1
-            if product.boxes_in_stock <= 0:
-                product.boxes_in_stock = 0
-                product.box_remaining_kg = Decimal("0.00")
-                break
-            product.box_remaining_kg = bw
-            br = bw
-
-        take = min(br, kg_left)
-        product.box_remaining_kg = q2(br - take)
-        kg_left = q2(kg_left - take)
-
-        # if finished current box exactly, consume one box
-        if q2(product.box_remaining_kg) == Decimal("0.00"):
-            product.boxes_in_stock -= 1
-            if product.boxes_in_stock > 0:
-                product.box_remaining_kg = bw
-            else:
-                product.boxes_in_stock = 0
-                product.box_remaining_kg = Decimal("0.00")
-                break
+    left = available - kg
+    if left == 0:
+        return WeightPlan(0, Decimal("0.00"), Decimal("0.00"))
+
+    new_boxes = int((left / bw).to_integral_value(rounding=ROUND_CEILING))
+    return WeightPlan(new_boxes, q2(left - (new_boxes - 1) * bw), left)
+
+
+def apply_weight_consumption(product: Product, kg_to_sell: Decimal, dry_run: bool = False) -> WeightPlan:
+    """
+    Deduct kg in memory (no locking, no save) using plan_weight_consumption.
+    With dry_run=True the product is left untouched (form validation / previews).
+    Callers are expected to hold the row lock and persist the product themselves.
+    """
+    plan = plan_weight_consumption(product, kg_to_sell)
+    if not dry_run:
+        product.boxes_in_stock = plan.boxes_in_stock
+        product.box_remaining_kg = plan.box_remaining_kg
+    return plan
+
+
+@transaction.atomic
+def consume_weight(*, product: Product, kg_to_sell: Decimal, dry_run: bool = False) -> Product:
+    """
+    Lock the product row, deduct kg (see plan_weight_consumption) and save.
+    dry_run=True only validates; nothing is locked or written.
+    """
+    if dry_run:
+        plan_weight_consumption(product, kg_to_sell)
+        return product
 
+    product = Product.objects.select_for_update().get(id=product.id)
+    apply_weight_consumption(product, kg_to_sell)
     product.save(update_fields=["boxes_in_stock", "box_remaining_kg"])
     return product
 
 
 
-
 # from decimal import Decimal
 # from django.db import transaction
 # from django.utils import timezone
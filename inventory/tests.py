@@ -1,3 +1,156 @@
-from django.test import TestCase
+import random
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from .forms import ProductForm
+from .models import Product
+from .services import q2, apply_weight_consumption, plan_weight_consumption
+
+
+def loop_consume(product, kg_to_sell):
+    """The original box-by-box loop, kept as the reference for the closed form."""
+    bw = q2(product.box_weight_kg)
+    kg_left = q2(kg_to_sell)
+    if kg_left <= 0:
+        return product
+
+    br = q2(product.box_remaining_kg)
+    if br <= 0:
+        product.box_remaining_kg = bw
+
+    available = product.available_weight_kg()
+    if kg_left > available:
+        raise ValueError(f"Not enough kg in stock. Available: {available}kg")
+
+    while kg_left > 0:
+        br = q2(product.box_remaining_kg)
+        if br <= 0:
+            product.boxes_in_stock -= 1
+            if product.boxes_in_stock <= 0:
+                product.boxes_in_stock = 0
+                product.box_remaining_kg = Decimal("0.00")
+                break
+            product.box_remaining_kg = bw
+            br = bw
+
+        take = min(br, kg_left)
+        product.box_remaining_kg = q2(br - take)
+        kg_left = q2(kg_left - take)
+
+        if q2(product.box_remaining_kg) == Decimal("0.00"):
+            product.boxes_in_stock -= 1
+            if product.boxes_in_stock > 0:
+                product.box_remaining_kg = bw
+            else:
+                product.boxes_in_stock = 0
+                product.box_remaining_kg = Decimal("0.00")
+                break
+    return product
+
+
+def boxed(boxes, box_weight, remaining):
+    return Product(
+        name="Fish", unit_price=Decimal("0.00"),
+        is_weighted=True, track_method="boxed_weight",
+        box_weight_kg=q2(box_weight), boxes_in_stock=boxes, box_remaining_kg=q2(remaining),
+    )
+
+
+class WeightConsumptionTests(SimpleTestCase):
+    def test_matches_loop_on_random_stock(self):
+        rng = random.Random(2026)
+        for _ in range(3000):
+            bw = q2(rng.choice(["5", "7.35", "10", "12.5", "25", "30"]))
+            boxes = rng.randint(1, 40)
+            # 0 = open box not initialized yet
+            br = rng.choice([Decimal("0.00"), bw, q2(Decimal(rng.randint(1, int(bw * 100))) / 100)])
+            available = boxed(boxes, bw, br).available_weight_kg()
+            kg = q2(Decimal(rng.randint(1, int(available * 100) + 500)) / 100)
+
+            expected, actual = boxed(boxes, bw, br), boxed(boxes, bw, br)
+            try:
+                loop_consume(expected, kg)
+            except ValueError:
+                with self.assertRaises(ValueError):
+                    apply_weight_consumption(actual, kg)
+                continue
+
+            apply_weight_consumption(actual, kg)
+            self.assertEqual(
+                (actual.boxes_in_stock, actual.box_remaining_kg),
+                (expected.boxes_in_stock, q2(expected.box_remaining_kg)),
+                msg=f"boxes={boxes} bw={bw} br={br} kg={kg}",
+            )
+            self.assertEqual(actual.available_weight_kg(), available - kg)
+            # never a negative or over-full box, never more boxes than before
+            self.assertTrue(0 <= actual.boxes_in_stock <= boxes)
+            if actual.boxes_in_stock:
+                self.assertTrue(Decimal("0.00") < actual.box_remaining_kg <= bw)
+            else:
+                self.assertEqual(actual.box_remaining_kg, Decimal("0.00"))
+
+    def test_box_boundaries(self):
+        # finishing the open box exactly opens the next one full
+        p = boxed(3, "30", "10")
+        apply_weight_consumption(p, Decimal("10"))
+        self.assertEqual((p.boxes_in_stock, p.box_remaining_kg), (2, Decimal("30.00")))
+
+        # 600kg out of 30kg boxes in one step
+        p = boxed(25, "30", "30")
+        apply_weight_consumption(p, Decimal("600"))
+        self.assertEqual((p.boxes_in_stock, p.box_remaining_kg), (5, Decimal("30.00")))
+
+        # selling everything empties the product
+        p = boxed(2, "30", "5")
+        apply_weight_consumption(p, Decimal("35"))
+        self.assertEqual((p.boxes_in_stock, p.box_remaining_kg), (0, Decimal("0.00")))
+
+    def test_dry_run_leaves_product_untouched(self):
+        p = boxed(4, "30", "12")
+        plan = apply_weight_consumption(p, Decimal("20"), dry_run=True)
+        self.assertEqual((plan.boxes_in_stock, plan.box_remaining_kg), (3, Decimal("22.00")))
+        self.assertEqual((p.boxes_in_stock, p.box_remaining_kg), (4, Decimal("12.00")))
+
+    def test_rejects_overfull_open_box(self):
+        # 45kg left in a 30kg box: the closed form would add a box instead of removing kg
+        p = boxed(2, "30", "45")
+        for kg in ("0.01", "10", "15", "75"):
+            with self.assertRaises(ValueError):
+                plan_weight_consumption(p, Decimal(kg))
+        self.assertEqual((p.boxes_in_stock, p.box_remaining_kg), (2, Decimal("45.00")))
+
+    def test_product_form_rejects_overfull_open_box(self):
+        data = {
+            "track_method": "boxed_weight", "name": "Fish", "sku": "F1", "unit_price": "10.00",
+            "wholesale_price": "9.00", "is_weighted": "on", "box_weight_kg": "30.00",
+            "boxes_in_stock": "2", "box_remaining_kg": "45.00", "quantity": "0", "min_quantity_alert": "0",
+        }
+        form = ProductForm(data)
+        self.assertFalse(form.is_valid())
+        self.assertIn("box_remaining_kg", form.errors)
+
+    def test_rejects_oversell_and_unweighted(self):
+        with self.assertRaises(ValueError):
+            plan_weight_consumption(boxed(1, "30", "30"), Decimal("30.01"))
+        with self.assertRaises(ValueError):
+            plan_weight_consumption(Product(name="Sausage", unit_price=Decimal("1.00"), quantity=5), Decimal("1"))
+
+
+class AvailableKgExpressionTests(TestCase):
+    def test_matches_python_rule(self):
+        rows = []
+        for is_weighted in (True, False):
+            for boxes in (-1, 0, 1, 2, 17):
+                for bw in ("0", "7.35", "30"):
+                    for br in ("-3", "0", "0.01", "12.5", "30", "45"):
+                        p = boxed(boxes, bw, br)
+                        p.is_weighted = is_weighted
+                        rows.append(p)
+        Product.objects.bulk_create(rows)
+
+        for p in Product.objects.with_available_kg():
+            self.assertEqual(
+                p.available_kg, p.available_weight_kg(),
+                msg=f"weighted={p.is_weighted} boxes={p.boxes_in_stock} bw={p.box_weight_kg} br={p.box_remaining_kg}",
+            )
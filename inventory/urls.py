@@ -4,6 +4,9 @@ from . import views
 urlpatterns = [
     path('', views.dashboard, name='inventory_dashboard'),
     path('products/', views.ProductListView.as_view(), name='product_list'),
+    path('products/search/', views.product_search, name='product_search'),
+    path('products/import/', views.product_import, name='product_import'),
+    path('products/export/', views.product_export, name='product_export'),
     path('products/add/', views.product_create, name='product_add'),
     path('products/<int:pk>/edit/', views.product_edit, name='product_edit'),
     path('products/<int:pk>/delete/', views.product_delete, name='product_delete'),
@@ -3,13 +3,16 @@ from django.views.generic import ListView, CreateView
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.db.models import F, Q
 from django.core.paginator import Paginator
 from decimal import Decimal, InvalidOperation
 from django.http import JsonResponse
 from users.utils import has_any_group
 from .models import Product, StockEntry, StockOut, Category
-from .forms import ProductForm, StockEntryForm, StockOutForm
+from .forms import ProductForm, StockEntryForm, StockOutForm, ImportUploadForm
+from . import imports, search
+from reports.exports import (
+    OPENPYXL_AVAILABLE, csv_response, export_filename, products_dataset, weight_prices_dataset, xlsx_response,
+)
 # from .services import ensure_default_sizes
 from .services import receive_weight_boxes
 
@@ -17,9 +20,12 @@ from .services import receive_weight_boxes
 @login_required
 @has_any_group("Admin", "Staff", "Accountant")
 def dashboard(request):
-    products = Product.objects.all().order_by("category", "-quantity")
-    low_stock = products.filter(quantity__lte=F('min_quantity_alert'))
-    context = {"products": products, "low_stock": low_stock}
+    # one query for the rows (stock status computed in the database), one for the counts
+    products = list(
+        Product.objects.with_stock_status().select_related("category").order_by("category", "-quantity")
+    )
+    low_stock = [p for p in products if p.stock_status != "ok"]
+    context = {"products": products, "low_stock": low_stock, "counts": Product.objects.stock_counts()}
     return render(request, "inventory/dashboard.html", context)
 
 class ProductListView(ListView):
@@ -29,21 +35,18 @@ class ProductListView(ListView):
     paginate_by = 12
 
     def get_queryset(self):
-        qs = Product.objects.select_related("category").all().order_by("category__name", "-quantity")
+        qs = Product.objects.with_stock_status().select_related("category").order_by("category__name", "-quantity")
 
         q = self.request.GET.get("q", "").strip()
         if q:
-            qs = qs.filter(
-                Q(name__icontains=q) |
-                Q(sku__icontains=q) |
-                Q(category__name__icontains=q)
-            )
+            qs = search.filter_queryset(qs, q)
 
         filter_mode = self.request.GET.get("filter")
+        # stock_status reads kg on hand for boxed products and units otherwise
         if filter_mode == "low":
-            qs = qs.filter(quantity__lte=F("min_quantity_alert"))
+            qs = qs.filter(stock_status__in=("low", "out"))
         elif filter_mode == "high":
-            qs = qs.filter(quantity__gt=F("min_quantity_alert"))
+            qs = qs.filter(stock_status="ok")
 
         category_id = self.request.GET.get("category")
         if category_id:
@@ -66,11 +69,25 @@ class ProductListView(ListView):
         if max_val is not None:
             qs = qs.filter(unit_price__lte=max_val)
 
+        # kg on hand, e.g. "under 60kg" (max_kg=60); only boxed products carry kg
+        min_kg = clean_decimal(self.request.GET.get("min_kg"))
+        max_kg = clean_decimal(self.request.GET.get("max_kg"))
+        if min_kg is not None or max_kg is not None:
+            qs = qs.filter(is_weighted=True)
+        if min_kg is not None:
+            qs = qs.filter(available_kg__gte=min_kg)
+        if max_kg is not None:
+            qs = qs.filter(available_kg__lt=max_kg)
+
         sort = self.request.GET.get("sort")
         if sort == "price_asc":
             qs = qs.order_by("unit_price")
         elif sort == "price_desc":
             qs = qs.order_by("-unit_price")
+        elif sort == "kg_asc":
+            qs = qs.order_by("-is_weighted", "available_kg", "name")
+        elif sort == "kg_desc":
+            qs = qs.order_by("-is_weighted", "-available_kg", "name")
 
         return qs
 
@@ -87,6 +104,8 @@ class ProductListView(ListView):
         context["current_category"] = self.request.GET.get("category", "")
         context["min_price"] = self.request.GET.get("min_price", "")
         context["max_price"] = self.request.GET.get("max_price", "")
+        context["min_kg"] = self.request.GET.get("min_kg", "")
+        context["max_kg"] = self.request.GET.get("max_kg", "")
         context["sort"] = self.request.GET.get("sort", "")
         return context
 
@@ -414,7 +433,7 @@ def retail_price_list(request):
     Admin-only view:
     Shows retail prices (unit_price).
     """
-    products = Product.objects.select_related("category").order_by("category__name", "name")
+    products = Product.objects.with_available_kg().select_related("category").order_by("category__name", "name")
 
     context = {
         "products": products,
@@ -430,7 +449,7 @@ def wholesale_price_list(request):
     Admin-only view:
     Shows wholesale prices (wholesale_price).
     """
-    products = Product.objects.select_related("category").order_by("category__name", "name")
+    products = Product.objects.with_available_kg().select_related("category").order_by("category__name", "name")
 
     context = {
         "products": products,
@@ -439,6 +458,60 @@ def wholesale_price_list(request):
     return render(request, "inventory/wholesale_price_list.html", context)
 
 
+@login_required
+def product_search(request):
+    """
+    Typeahead: the best 20 products for ?q= as JSON, an exact SKU match short-circuiting
+    the ranked search (see inventory/search.py).
+    """
+    return JsonResponse({"results": search.search_products(request.GET.get("q", ""))})
+
+
+@login_required
+@has_any_group("Admin", "Accountant")
+def product_import(request):
+    """
+    Upload a product or weight-price sheet (CSV/XLSX). A dry run (the default) reports
+    what would be created / updated / rejected; applying is all-or-nothing.
+    """
+    report = None
+    if request.method == "POST":
+        form = ImportUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            dry_run = form.cleaned_data["dry_run"]
+            try:
+                rows = imports.read_rows(upload, upload.name)
+                if form.cleaned_data["kind"] == "products":
+                    report = imports.import_products(rows, user=request.user, dry_run=dry_run)
+                else:
+                    report = imports.import_weight_prices(rows, dry_run=dry_run)
+            except imports.SheetError as e:
+                form.add_error("file", str(e))
+            else:
+                if report.applied:
+                    messages.success(
+                        request, f"✅ Import applied: {report.created} created, {report.updated} updated."
+                    )
+                elif report.error_count:
+                    messages.error(request, f"❌ {report.error_count} row(s) have errors; nothing was changed.")
+    else:
+        form = ImportUploadForm()
+    return render(request, "inventory/product_import.html", {"form": form, "report": report})
+
+
+@login_required
+@has_any_group("Admin", "Accountant")
+def product_export(request):
+    """?kind=products|weight_prices&format=csv|xlsx, in the layout product_import reads back."""
+    kind = request.GET.get("kind")
+    dataset = weight_prices_dataset() if kind == "weight_prices" else products_dataset()
+    name = "weight_prices" if kind == "weight_prices" else "products"
+    if request.GET.get("format") == "xlsx" and OPENPYXL_AVAILABLE:
+        return xlsx_response([dataset], export_filename(name, "xlsx"))
+    return csv_response(dataset, export_filename(name, "csv"))
+
+
 
 """✅ What This Version Adds
 Feature	Benefit
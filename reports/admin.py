@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import ExportJob
 
-# Register your models here.
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
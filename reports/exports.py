@@ -0,0 +1,398 @@
+# reports/exports.py
+import csv
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, NamedTuple
+
+from django.contrib.auth.models import User
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from analytics.services import day_bounds
+from expenses.models import Expense
+from inventory.models import Product, ProductWeightPrice
+from sales.models import CreditPayment, Sale, SaleItem
+
+try:
+    import openpyxl  # type: ignore
+    from openpyxl.utils import get_column_letter  # type: ignore
+    OPENPYXL_AVAILABLE = True
+except Exception:
+    openpyxl = None
+    OPENPYXL_AVAILABLE = False
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# rows fetched per round trip; the DB cursor is streamed, never materialised
+CHUNK_SIZE = 2000
+
+
+class Dataset(NamedTuple):
+    title: str
+    headers: list
+    rows: Callable  # () -> iterator of tuples, one query when consumed
+    widths: tuple = ()  # spreadsheet column widths, known before any row is written
+
+
+def parse_date_range(params):
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD -> (date|None, date|None); bad values are ignored."""
+    def _d(value):
+        try:
+            return datetime.strptime((value or "").strip(), "%Y-%m-%d").date()
+        except ValueError:
+            return None
+    return _d(params.get("start")), _d(params.get("end"))
+
+
+def in_range(qs, start=None, end=None, field="timestamp"):
+    """Filter a timestamp column to the dates start..end (either may be open)."""
+    if not (start or end):
+        return qs
+    today = timezone.localdate()
+    lo, hi = day_bounds(start or today, end or today)
+    if start:
+        qs = qs.filter(**{f"{field}__gte": lo})
+    if end:
+        qs = qs.filter(**{f"{field}__lt": hi})
+    return qs
+
+
+def _stream(qs, fields):
+    """values_list iterator with datetimes shown in local time."""
+    for row in qs.values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+        yield tuple(timezone.localtime(v).replace(tzinfo=None, microsecond=0) if isinstance(v, datetime) else v for v in row)
+
+
+# --------------------------
+# Datasets
+# --------------------------
+def sales_dataset(start=None, end=None):
+    qs = in_range(Sale.objects.all(), start, end).order_by("-timestamp", "-id")
+    fields = [
+        "id", "timestamp", "created_by__username", "sale_type", "customer_name", "customer_phone",
+        "payment_method", "is_credit", "subtotal_amount", "vat_amount", "total_amount", "amount_paid",
+    ]
+    headers = [
+        "Sale ID", "Date", "Created By", "Type", "Customer", "Phone",
+        "Payment", "Credit", "Subtotal", "VAT", "Total", "Paid",
+    ]
+    widths = (9, 20, 16, 10, 22, 14, 10, 8, 12, 10, 12, 12)
+    return Dataset("Sales", headers, lambda: _stream(qs, fields), widths)
+
+
+def sale_items_dataset(start=None, end=None):
+    qs = (
+        in_range(SaleItem.objects.all(), start, end, field="sale__timestamp")
+        .annotate(line_total_db=ExpressionWrapper(
+            F("quantity") * F("unit_price"),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ))
+        .order_by("-sale__timestamp", "-sale_id", "id")
+    )
+    fields = [
+        "sale_id", "sale__timestamp", "sale__sale_type", "product__name", "product__sku",
+        "weight_price__weight_kg", "quantity", "unit_price", "line_total_db",
+    ]
+    headers = ["Sale ID", "Date", "Type", "Product", "SKU", "Weight (kg)", "Qty", "Unit Price", "Line Total"]
+    widths = (9, 20, 10, 28, 14, 12, 8, 12, 12)
+    return Dataset("Line Items", headers, lambda: _stream(qs, fields), widths)
+
+
+def credit_payments_dataset(start=None, end=None):
+    qs = in_range(CreditPayment.objects.all(), start, end, field="paid_on").order_by("-paid_on", "-id")
+    fields = ["id", "paid_on", "sale_id", "sale__customer_name", "amount", "payment_method", "reference", "received_by__username"]
+    headers = ["Payment ID", "Paid On", "Sale ID", "Customer", "Amount", "Method", "Reference", "Received By"]
+    widths = (11, 20, 9, 22, 12, 14, 18, 16)
+    return Dataset("Credit Payments", headers, lambda: _stream(qs, fields), widths)
+
+
+def expenses_dataset(start=None, end=None):
+    qs = in_range(Expense.objects.all(), start, end).order_by("-timestamp", "-id")
+    fields = ["id", "timestamp", "created_by__username", "amount", "category__name", "note"]
+    headers = ["Expense ID", "Date", "Created By", "Amount", "Category", "Note"]
+    widths = (11, 20, 16, 12, 18, 40)
+    return Dataset("Expenses", headers, lambda: _stream(qs, fields), widths)
+
+
+# headers double as the column names inventory/imports.py reads back
+def products_dataset():
+    qs = Product.objects.order_by("sku", "id")
+    fields = [
+        "sku", "name", "category__name", "track_method", "unit_price", "wholesale_price", "is_weighted",
+        "box_weight_kg", "boxes_in_stock", "box_remaining_kg", "quantity", "min_quantity_alert",
+    ]
+    headers = [
+        "SKU", "Name", "Category", "Track Method", "Unit Price", "Wholesale Price", "Is Weighted",
+        "Box Weight (kg)", "Boxes In Stock", "Box Remaining (kg)", "Quantity", "Min Quantity Alert",
+    ]
+    widths = (14, 28, 18, 14, 12, 14, 11, 14, 13, 17, 10, 17)
+    return Dataset("Products", headers, lambda: _stream(qs, fields), widths)
+
+
+def weight_prices_dataset():
+    qs = ProductWeightPrice.objects.order_by("product__sku", "product_id", "weight_kg")
+    fields = ["product__sku", "product__name", "weight_kg", "retail_price", "wholesale_price", "is_active"]
+    headers = ["SKU", "Product", "Weight (kg)", "Retail Price", "Wholesale Price", "Is Active"]
+    widths = (14, 28, 12, 12, 14, 10)
+    return Dataset("Weight Prices", headers, lambda: _stream(qs, fields), widths)
+
+
+# --------------------------
+# CSV
+# --------------------------
+class Echo:
+    """File-like object whose write() just hands the line back (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def export_filename(prefix, ext, start=None, end=None):
+    span = ""
+    if start or end:
+        span = f"_{start or 'begin'}_to_{end or 'now'}"
+    return f"{prefix}{span}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
+
+
+def csv_response(dataset, filename):
+    """Stream a dataset as CSV: constant memory, one query."""
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(dataset.headers)
+        for row in dataset.rows():
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+# --------------------------
+# Excel
+# --------------------------
+def write_xlsx(datasets, fileobj):
+    """
+    One sheet per dataset using a write-only workbook: rows go straight to the zip stream
+    (nothing is kept per cell), and widths are set up front instead of rescanning columns.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    for ds in datasets:
+        ws = wb.create_sheet(title=ds.title)
+        for idx, width in enumerate(ds.widths, start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+        ws.append(ds.headers)
+        for row in ds.rows():
+            ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_response(datasets, filename):
+    """Build the workbook in a spooled temp file and stream it back from disk."""
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(datasets, tmp)
+    tmp.seek(0)
+    # FileResponse closes (and so deletes) the temp file once sent
+    return FileResponse(tmp, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+# --------------------------
+# PDF
+# --------------------------
+# in-memory up to this size, then the spooled file rolls over to disk
+PDF_SPOOL_SIZE = 5 * 1024 * 1024
+
+
+class Column(NamedTuple):
+    header: str
+    x: float
+    right: bool = False  # right-aligned at x
+    max_chars: int = 0   # truncate long text (0 = no limit)
+
+
+def report_filters(params):
+    """Date range plus the optional ?type=, ?cashier=<user id> and ?category=<id> filters."""
+    def _id(value):
+        value = (value or "").strip()
+        return int(value) if value.isdigit() else None
+
+    start, end = parse_date_range(params)
+    sale_type = params.get("type")
+    return {
+        "start": start,
+        "end": end,
+        "sale_type": sale_type if sale_type in dict(Sale.SALE_TYPES) else None,
+        "cashier": _id(params.get("cashier")),
+        "category": _id(params.get("category")),
+    }
+
+
+def _pdf_header(p, title, width, height):
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(40, height - 50, title)
+    p.setFont("Helvetica", 9)
+    p.drawString(40, height - 65, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+def _person(first, last, username):
+    return f"{first or ''} {last or ''}".strip() or username or "—"
+
+
+def _money(value):
+    return f"{float(value or 0):,.2f}"
+
+
+class PdfReport:
+    """
+    Tabular PDF writer: rows are drawn as they arrive, with a repeated column header,
+    a subtotal line whenever the day changes and a grand total at the end.
+    """
+    row_height = 12
+    bottom = 60
+
+    def __init__(self, fileobj, title, columns, subtitle=""):
+        self.p = canvas.Canvas(fileobj, pagesize=A4)
+        self.width, self.height = A4
+        self.title, self.columns, self.subtitle = title, columns, subtitle
+        self.page = 0
+        self._new_page()
+
+    def _new_page(self):
+        if self.page:
+            self.p.showPage()
+        self.page += 1
+        p, y = self.p, self.height - 50
+        if self.page == 1:
+            _pdf_header(p, self.title, self.width, self.height)
+            y = self.height - 80
+            if self.subtitle:
+                p.drawString(40, y, self.subtitle)
+                y -= 16
+        p.setFont("Helvetica", 8)
+        p.drawRightString(self.width - 40, 30, f"{self.title} — page {self.page}")
+        p.setFont("Helvetica-Bold", 9)
+        for col in self.columns:
+            (p.drawRightString if col.right else p.drawString)(col.x, y, col.header)
+        p.line(35, y - 3, self.width - 35, y - 3)
+        self.y = y - 14
+        p.setFont("Helvetica", 9)
+
+    def _room(self, lines=1):
+        if self.y - (lines - 1) * self.row_height < self.bottom:
+            self._new_page()
+
+    def row(self, cells):
+        self._room()
+        for col, value in zip(self.columns, cells):
+            text = "" if value is None else str(value)
+            if col.max_chars and len(text) > col.max_chars:
+                text = text[:col.max_chars - 1] + "…"
+            (self.p.drawRightString if col.right else self.p.drawString)(col.x, self.y, text)
+        self.y -= self.row_height
+
+    def total(self, label, amount, count=None, bold=False):
+        self._room(2)
+        self.p.line(self.width - 200, self.y + 9, self.width - 35, self.y + 9)
+        self.p.setFont("Helvetica-Bold" if bold else "Helvetica-Oblique", 9)
+        if count is not None:
+            label = f"{label} ({count} rows)"
+        self.p.drawString(self.width - 300, self.y, label)
+        self.p.drawRightString(self.width - 40, self.y, _money(amount))
+        self.p.setFont("Helvetica", 9)
+        self.y -= self.row_height + 6
+
+    def write(self, rows):
+        """rows: (day, cells, amount) tuples ordered by day."""
+        day = None
+        day_total = grand_total = Decimal("0.00")
+        day_count = grand_count = 0
+        for row_day, cells, amount in rows:
+            if day is not None and row_day != day:
+                self.total(f"Subtotal {day:%Y-%m-%d}", day_total, day_count)
+                day_total, day_count = Decimal("0.00"), 0
+            day = row_day
+            self.row(cells)
+            day_total += amount or 0
+            grand_total += amount or 0
+            day_count += 1
+            grand_count += 1
+        if day is not None:
+            self.total(f"Subtotal {day:%Y-%m-%d}", day_total, day_count)
+        self.total("Grand total", grand_total, grand_count, bold=True)
+        self.p.showPage()
+        self.p.save()
+
+
+def _subtitle(start, end, **parts):
+    bits = [f"Period: {start or 'beginning'} to {end or 'today'}"]
+    bits += [f"{k.replace('_', ' ').title()}: {v}" for k, v in parts.items() if v]
+    return "   ".join(bits)
+
+
+def _cashier_name(user_id):
+    if not user_id:
+        return None
+    return _person(*(User.objects.filter(id=user_id).values_list("first_name", "last_name", "username").first() or (None, None, f"#{user_id}")))
+
+
+SALES_COLUMNS = [
+    Column("ID", 40), Column("Time", 80), Column("Cashier", 160, max_chars=20), Column("Type", 265),
+    Column("Customer", 320, max_chars=22), Column("Payment", 440), Column("Total (₵)", 555, right=True),
+]
+
+
+def write_sales_pdf(fileobj, start=None, end=None, sale_type=None, cashier=None):
+    qs = in_range(Sale.objects.all(), start, end)
+    if sale_type:
+        qs = qs.filter(sale_type=sale_type)
+    if cashier:
+        qs = qs.filter(created_by_id=cashier)
+    fields = [
+        "id", "timestamp", "created_by__first_name", "created_by__last_name", "created_by__username",
+        "sale_type", "customer_name", "payment_method", "total_amount",
+    ]
+    rows = (
+        (ts.date(), [sale_id, ts.strftime("%Y-%m-%d %H:%M"), _person(first, last, username), stype,
+                     customer or "Walk-in", payment, _money(total)], total)
+        for sale_id, ts, first, last, username, stype, customer, payment, total
+        in _stream(qs.order_by("timestamp", "id"), fields)
+    )
+    subtitle = _subtitle(start, end, type=sale_type, cashier=_cashier_name(cashier))
+    PdfReport(fileobj, "Sales Report", SALES_COLUMNS, subtitle).write(rows)
+
+
+EXPENSES_COLUMNS = [
+    Column("Time", 40), Column("Recorded by", 130, max_chars=20), Column("Category", 240, max_chars=18),
+    Column("Note", 340, max_chars=32), Column("Amount (₵)", 555, right=True),
+]
+
+
+def write_expenses_pdf(fileobj, start=None, end=None, category=None, cashier=None):
+    qs = in_range(Expense.objects.all(), start, end)
+    if category:
+        qs = qs.filter(category_id=category)
+    if cashier:
+        qs = qs.filter(created_by_id=cashier)
+    fields = [
+        "timestamp", "created_by__first_name", "created_by__last_name", "created_by__username",
+        "category__name", "note", "amount",
+    ]
+    rows = (
+        (ts.date(), [ts.strftime("%Y-%m-%d %H:%M"), _person(first, last, username), category_name or "—",
+                     note or "—", _money(amount)], amount)
+        for ts, first, last, username, category_name, note, amount
+        in _stream(qs.order_by("timestamp", "id"), fields)
+    )
+    subtitle = _subtitle(start, end, recorded_by=_cashier_name(cashier))
+    PdfReport(fileobj, "Expenses Report", EXPENSES_COLUMNS, subtitle).write(rows)
+
+
+def pdf_response(write, filename, **filters):
+    """Render with `write(fileobj, **filters)` into a spooled temp file and stream it back."""
+    tmp = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_SIZE)
+    write(tmp, **filters)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=filename, content_type="application/pdf")
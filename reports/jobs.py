@@ -0,0 +1,139 @@
+# reports/jobs.py
+import csv
+import io
+import os
+import tempfile
+import traceback
+from datetime import date, timedelta
+
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .exports import (
+    export_filename, write_xlsx, write_sales_pdf, write_expenses_pdf,
+    sales_dataset, sale_items_dataset, credit_payments_dataset, expenses_dataset,
+)
+from .models import ExportJob
+
+
+def _write_csv(dataset_fn):
+    def render(fileobj, start, end):
+        text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        ds = dataset_fn(start, end)
+        writer.writerow(ds.headers)
+        writer.writerows(ds.rows())
+        text.flush()
+        text.detach()
+    return render
+
+
+def _write_workbook(fileobj, start, end):
+    write_xlsx(
+        [
+            sales_dataset(start, end),
+            sale_items_dataset(start, end),
+            credit_payments_dataset(start, end),
+            expenses_dataset(start, end),
+        ],
+        fileobj,
+    )
+
+
+# kind -> (file prefix, extension, renderer(fileobj, start, end, **filters), report_filters() it takes)
+# same filters as the synchronous export of the same kind
+EXPORT_KINDS = {
+    "sales_csv": ("sales", "csv", _write_csv(sales_dataset), ()),
+    "sale_items_csv": ("sale_items", "csv", _write_csv(sale_items_dataset), ()),
+    "expenses_csv": ("expenses", "csv", _write_csv(expenses_dataset), ()),
+    "sales_excel": ("sales", "xlsx", _write_workbook, ()),
+    "sales_pdf": ("sales", "pdf", write_sales_pdf, ("sale_type", "cashier")),
+    "expenses_pdf": ("expenses", "pdf", write_expenses_pdf, ("category", "cashier")),
+}
+
+
+def _parse(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def enqueue(kind, user, start=None, end=None, **filters):
+    """Queue an export; `filters` are report_filters() values, those the kind doesn't take are dropped."""
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export: {kind}")
+    params = {"start": start.isoformat() if start else "", "end": end.isoformat() if end else ""}
+    for name in EXPORT_KINDS[kind][3]:
+        if filters.get(name) is not None:
+            params[name] = filters[name]
+    return ExportJob.objects.create(kind=kind, params=params, created_by=user)
+
+
+def claim_jobs(limit):
+    """
+    Move up to `limit` pending jobs to running and return their ids.
+    SKIP LOCKED lets several workers poll the same table without handing out a job twice;
+    the conditional UPDATE keeps that true on databases without row locks (SQLite).
+    """
+    if limit <= 0:
+        return []
+    with transaction.atomic():
+        ids = list(
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ExportJob.PENDING)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        claimed = []
+        for job_id in ids:
+            if ExportJob.objects.filter(id=job_id, status=ExportJob.PENDING).update(
+                status=ExportJob.RUNNING, started_at=timezone.now()
+            ):
+                claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale(minutes):
+    """Jobs left running by a worker that died are handed out again."""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return ExportJob.objects.filter(status=ExportJob.RUNNING, started_at__lt=cutoff).update(
+        status=ExportJob.PENDING, started_at=None
+    )
+
+
+def purge_expired(days):
+    """Delete jobs finished more than `days` ago; their files go with them (ExportJob post_delete)."""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = ExportJob.objects.filter(
+        status__in=[ExportJob.DONE, ExportJob.FAILED], finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def run_job(job_id):
+    """Render one claimed job into the export storage. Returns the final status."""
+    job = ExportJob.objects.get(id=job_id)
+    prefix, ext, render, filter_names = EXPORT_KINDS[job.kind]
+    start, end = _parse(job.params.get("start")), _parse(job.params.get("end"))
+    filters = {name: job.params[name] for name in filter_names if job.params.get(name) is not None}
+
+    fd, path = tempfile.mkstemp(suffix=f".{ext}")
+    try:
+        with os.fdopen(fd, "w+b") as tmp:
+            render(tmp, start, end, **filters)
+            tmp.seek(0)
+            job.file.save(export_filename(prefix, ext, start, end), File(tmp), save=False)
+        job.status = ExportJob.DONE
+        job.error = ""
+    except Exception:
+        job.status = ExportJob.FAILED
+        job.error = traceback.format_exc()
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["file", "status", "error", "finished_at"])
+    return job.status
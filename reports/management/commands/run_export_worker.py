@@ -0,0 +1,65 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from reports import worker
+from reports.jobs import claim_jobs, purge_expired, requeue_stale
+
+PURGE_EVERY = 60 * 60  # seconds
+
+
+class Command(BaseCommand):
+    help = "Render queued ExportJobs (CSV / Excel / PDF) in a local process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=2, help="jobs rendered at the same time")
+        parser.add_argument("--poll", type=float, default=2.0, help="seconds between queue checks when idle")
+        parser.add_argument("--stale-minutes", type=int, default=60, help="requeue jobs running longer than this")
+        parser.add_argument(
+            "--keep-days", type=int, default=settings.EXPORTS_KEEP_DAYS,
+            help="delete finished jobs and their files after this many days",
+        )
+        parser.add_argument("--once", action="store_true", help="drain the queue and exit")
+
+    def handle(self, *args, **opts):
+        requeued = requeue_stale(opts["stale_minutes"])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        # spawned children set Django up themselves and never share the parent's DB connection
+        ctx = multiprocessing.get_context("spawn")
+        running = {}
+        next_purge = 0
+        with ProcessPoolExecutor(max_workers=opts["processes"], mp_context=ctx, initializer=worker.init_process) as pool:
+            while True:
+                if time.monotonic() >= next_purge:
+                    purged = purge_expired(opts["keep_days"])
+                    if purged:
+                        self.stdout.write(f"Deleted {purged} expired export(s)")
+                    next_purge = time.monotonic() + PURGE_EVERY
+
+                for job_id, future in list(running.items()):
+                    if future.done():
+                        del running[job_id]
+                        try:
+                            status = future.result()
+                        except Exception as e:  # the child process itself died
+                            status = f"crashed ({e})"
+                        self.stdout.write(f"Job #{job_id}: {status}")
+
+                for job_id in claim_jobs(opts["processes"] - len(running)):
+                    running[job_id] = pool.submit(worker.run, job_id)
+                    self.stdout.write(f"Job #{job_id}: started")
+
+                if opts["once"] and not running:
+                    break
+                if not running:
+                    # don't hold a connection open while idle
+                    connection.close()
+                time.sleep(opts["poll"] if not running else 0.2)
+
+        self.stdout.write(self.style.SUCCESS("Export worker stopped"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:06
+
+import reports.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='file',
+            field=models.FileField(blank=True, storage=reports.models.export_storage, upload_to='exports/'),
+        ),
+    ]
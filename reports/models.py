@@ -1,3 +1,60 @@
-from django.db import models
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import models, transaction
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+def export_storage():
+    """settings.EXPORTS_STORAGE: in production a bucket both the web and worker services reach."""
+    return storages.create_storage(settings.EXPORTS_STORAGE)
+
+
+class ExportJob(models.Model):
+    """
+    A heavy export (CSV / Excel / PDF) queued by the web process and rendered by
+    `manage.py run_export_worker` into exports/ of the export storage. The worker deletes
+    finished jobs and their files after settings.EXPORTS_KEEP_DAYS.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=30)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    file = models.FileField(upload_to="exports/", blank=True, storage=export_storage)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            # the worker's queue scan
+            models.Index(fields=["status", "created_at"], name="exportjob_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_delete, sender=ExportJob)
+def export_file_deleted(sender, instance, **kwargs):
+    if instance.file:
+        storage, name = instance.file.storage, instance.file.name
+        # after commit: a rolled-back delete keeps its file
+        transaction.on_commit(lambda: storage.delete(name))
@@ -1,3 +1,74 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from analytics.services import rebuild_daily_summary
+from expenses.models import Expense, ExpenseCategory
+from sales.models import Sale
+
+
+class ChartValidatorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser("owner", password="pw")
+        self.client.force_login(self.user)
+        self.url = reverse("chart_sales_vs_expenses") + "?group=day&days=7"
+        self.old = Sale.objects.create(created_by=self.user, total_amount=Decimal("20.00"))
+        Sale.objects.filter(pk=self.old.pk).update(timestamp=timezone.now() - timedelta(days=2))
+        Sale.objects.create(created_by=self.user, total_amount=Decimal("5.00"))
+        rebuild_daily_summary()
+
+    def etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def assertChangedAfter(self, etag):
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_unchanged_data_is_not_modified(self):
+        etag = self.etag()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_deleting_an_older_sale_changes_the_etag(self):
+        etag = self.etag()
+        Sale.objects.get(pk=self.old.pk).delete()
+        self.assertChangedAfter(etag)
+
+    def test_editing_an_older_sale_changes_the_etag(self):
+        etag = self.etag()
+        sale = Sale.objects.get(pk=self.old.pk)
+        sale.total_amount = Decimal("25.00")
+        sale.save()
+        self.assertChangedAfter(etag)
+
+    def test_older_expense_changes_the_etag(self):
+        expense = Expense.objects.create(amount=Decimal("8.00"), created_by=self.user)
+        Expense.objects.filter(pk=expense.pk).update(timestamp=timezone.now() - timedelta(days=3))
+        rebuild_daily_summary()
+        etag = self.etag()
+        Expense.objects.get(pk=expense.pk).delete()
+        self.assertChangedAfter(etag)
+
+
+class ExpensesPdfTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("boss", password="pw")
+        self.user.groups.add(Group.objects.create(name="SuperAdmin"))
+        self.client.force_login(self.user)
+        self.fuel = ExpenseCategory.objects.create(name="Fuel")
+
+    def test_summary_offers_the_filters_its_roles_can_download(self):
+        response = self.client.get(reverse("reports_summary"))
+        self.assertContains(response, 'name="category"')
+        self.assertContains(response, f'<option value="{self.fuel.id}">Fuel</option>', html=True)
 
-# Create your tests here.
+        Expense.objects.create(amount=Decimal("8.00"), category=self.fuel, created_by=self.user)
+        response = self.client.get(
+            reverse("export_expenses_pdf"), {"category": self.fuel.id, "cashier": self.user.id},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
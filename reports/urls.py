@@ -14,7 +14,12 @@ from . import views
 urlpatterns = [
     path("", views.summary, name="reports_summary"),
     path("export/sales/csv/", views.export_sales_csv, name="export_sales_csv"),
+    path("export/sales/items/csv/", views.export_sale_items_csv, name="export_sale_items_csv"),
+    path("export/expenses/csv/", views.export_expenses_csv, name="export_expenses_csv"),
     path("export/sales/excel/", views.export_sales_excel, name="export_sales_excel"),
     path("export/sales/pdf/", views.export_sales_pdf, name="export_sales_pdf"),
+    path("jobs/<str:kind>/create/", views.export_job_create, name="export_job_create"),
+    path("jobs/<int:job_id>/", views.export_job_status, name="export_job_status"),
+    path("jobs/<int:job_id>/download/", views.export_job_download, name="export_job_download"),
     path("api/chart-sales-expenses/", views.chart_sales_vs_expenses, name="chart_sales_vs_expenses"),
 ]
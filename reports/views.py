@@ -2,11 +2,17 @@
  
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
 from django.db.models import Sum, F, ExpressionWrapper, DecimalField
 from sales.models import Sale, SaleItem
-from expenses.models import Expense
+from expenses.models import Expense, ExpenseCategory
 from inventory.models import Product
-from django.http import HttpResponse,JsonResponse
+from django.http import HttpResponse,JsonResponse, FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import condition, require_POST
+from django.utils.cache import patch_cache_control
+import os
 import csv
 import io
 from django.http import HttpResponse
@@ -19,6 +25,14 @@ from django.db.models import Sum
 from datetime import datetime, timedelta
 from users.utils import has_any_group
 from django.template.loader import render_to_string
+from django.utils import timezone
+from analytics.services import CHART_GROUPS, chart_series, period_totals, product_performance, summary_last_modified
+from .exports import (
+    parse_date_range, report_filters, export_filename, csv_response, xlsx_response, pdf_response, write_sales_pdf,
+    sales_dataset, sale_items_dataset, credit_payments_dataset, expenses_dataset,
+)
+from .jobs import EXPORT_KINDS, enqueue
+from .models import ExportJob
 
 try:
     import openpyxl  # type: ignore
@@ -64,29 +78,26 @@ def summary(request):
     end = request.GET.get("end")
 
     qs_sales = Sale.objects.all()
-    qs_expenses = Expense.objects.all()
-
     if start:
         qs_sales = qs_sales.filter(timestamp__date__gte=start)
-        qs_expenses = qs_expenses.filter(timestamp__date__gte=start)
     if end:
         qs_sales = qs_sales.filter(timestamp__date__lte=end)
-        qs_expenses = qs_expenses.filter(timestamp__date__lte=end)
 
-    total_sales = qs_sales.aggregate(total=Sum("total_amount"))["total"] or Decimal("0.00")
-    total_expenses = qs_expenses.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+    # ✅ totals come from the pre-aggregated DailySummary table (O(days), not O(sales))
+    totals = period_totals(start, end)
+    total_sales = totals["sales_total"]
+    total_expenses = totals["expenses_total"]
     gross_profit = total_sales - total_expenses
 
     # ✅ CREDIT METRICS
     credit_qs = qs_sales.filter(is_credit=True)
 
-    credit_sales_total = credit_qs.aggregate(total=Sum("total_amount"))["total"] or Decimal("0.00")
-    # compute outstanding as sum of (total_amount - amount_paid)
-    credit_outstanding_expr = ExpressionWrapper(F("total_amount") - F("amount_paid"), output_field=DecimalField())
-    credit_outstanding = credit_qs.aggregate(total=Sum(credit_outstanding_expr))["total"] or Decimal("0.00")
+    credit_sales_total = totals["credit_sales_total"]
+    # outstanding = sum of (total_amount - amount_paid) over open credit sales
+    credit_outstanding = totals["credit_outstanding"]
 
-    # option A (simple): use Sale.amount_paid
-    credit_paid_via_sales = credit_qs.aggregate(total=Sum("amount_paid"))["total"] or Decimal("0.00")
+    # option A (simple): paid part of the credit sales
+    credit_paid_via_sales = credit_sales_total - credit_outstanding
 
     # option B (better): use CreditPayment records if you have them
     credit_paid_via_payments = Decimal("0.00")
@@ -94,12 +105,8 @@ def summary(request):
         pay_qs = CreditPayment.objects.filter(sale__in=credit_qs)
         credit_paid_via_payments = pay_qs.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
 
-    best_selling = (
-        SaleItem.objects
-        .values("product__name")
-        .annotate(qty=Sum("quantity"))
-        .order_by("-qty")[:10]
-    )
+    # ✅ best sellers for the same period, ranked by revenue (kg counts for weighted fish)
+    best_selling = product_performance(start, end, limit=10)
 
     context = {
         "total_sales": total_sales,
@@ -114,6 +121,9 @@ def summary(request):
         "credit_paid_via_payments": credit_paid_via_payments,
         "start": start,
         "end": end,
+        # PDF report filter
+        "cashiers": User.objects.filter(is_active=True).only("id", "username", "first_name", "last_name").order_by("username"),
+        "categories": ExpenseCategory.objects.order_by("name"),
     }
     return render(request, "reports/summary.html", context)
 
@@ -162,31 +172,24 @@ def summary(request):
 #     return response
 # added by frank for exporting expenses to csv
 @login_required
+@has_any_group("Admin","Accountant")
 def export_expenses_csv(request):
-    expenses = Expense.objects.all().order_by("-timestamp")
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="expenses_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    writer = csv.writer(response)
-    writer.writerow(["Expense ID", "Date", "Created By", "Amount", "Category", "Note"])
-    for e in expenses:
-        writer.writerow([e.id, e.timestamp, e.created_by.username if e.created_by else "", e.amount, e.category.name if e.category else "", e.note])
-    return response
-
+    start, end = parse_date_range(request.GET)
+    return csv_response(expenses_dataset(start, end), export_filename("expenses", "csv", start, end))
 
 
+@login_required
+@has_any_group("Admin","Accountant")
+def export_sales_csv(request):
+    start, end = parse_date_range(request.GET)
+    return csv_response(sales_dataset(start, end), export_filename("sales", "csv", start, end))
 
 
 @login_required
 @has_any_group("Admin","Accountant")
-def export_sales_csv(request):
-    sales = Sale.objects.all().order_by("-timestamp")
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="sales_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    writer = csv.writer(response)
-    writer.writerow(["Sale ID", "Date", "Created By", "Total"])
-    for s in sales:
-        writer.writerow([s.id, s.timestamp, s.created_by.username if s.created_by else "", s.total_amount])
-    return response
+def export_sale_items_csv(request):
+    start, end = parse_date_range(request.GET)
+    return csv_response(sale_items_dataset(start, end), export_filename("sale_items", "csv", start, end))
 
 @login_required
 @has_any_group("SuperAdmin","Admin","Accountant")       
@@ -197,95 +200,120 @@ def export_sales_excel(request):
             status=500,
         )
 
-    sales = Sale.objects.all().order_by("-timestamp")
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Sales"
-
-    headers = ["Sale ID", "Date", "Created By", "Total"]
-    for col, h in enumerate(headers, 1):
-        ws.cell(row=1, column=col, value=h)
-
-    for idx, s in enumerate(sales, start=2):
-        ws.cell(row=idx, column=1, value=s.id)
-        ws.cell(row=idx, column=2, value=s.timestamp.strftime("%Y-%m-%d %H:%M:%S"))
-        ws.cell(row=idx, column=3, value=s.created_by.username if s.created_by else "")
-        ws.cell(row=idx, column=4, value=float(s.total_amount))
-
-    # Autosize columns
-    for col in ws.columns:
-        max_length = 0
-        col_letter = get_column_letter(col[0].column)
-        for cell in col:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except:
-                pass
-        ws.column_dimensions[col_letter].width = max_length + 2
-
-    out = io.BytesIO()
-    wb.save(out)
-    out.seek(0)
-    response = HttpResponse(out.read(), content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = f'attachment; filename="sales_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-    return response
+    start, end = parse_date_range(request.GET)
+    datasets = [
+        sales_dataset(start, end),
+        sale_items_dataset(start, end),
+        credit_payments_dataset(start, end),
+        expenses_dataset(start, end),
+    ]
+    return xlsx_response(datasets, export_filename("sales", "xlsx", start, end))
 
 @login_required
 @has_any_group("SuperAdmin","SubAdmin","Admin","Accountant")
 def export_sales_pdf(request):
-    sales = Sale.objects.all().order_by('-timestamp')
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(40, height - 50, "Sales Report")
-    p.setFont("Helvetica", 9)
-    p.drawString(40, height - 65, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-    y = height - 90
-    p.setFont("Helvetica-Bold", 9)
-    p.drawString(40, y, "ID")
-    p.drawString(90, y, "Date")
-    p.drawString(220, y, "User")
-    p.drawRightString(width - 40, y, "Total (₵)")
-    p.line(35, y-3, width-35, y-3)
-    y -= 14
-    p.setFont("Helvetica", 9)
-
-    for s in sales:
-        if y < 60:
-            p.showPage()
-            y = height - 40
-        p.drawString(40, y, str(s.id))
-        p.drawString(90, y, s.timestamp.strftime("%Y-%m-%d"))
-        p.drawString(220, y, s.created_by.get_full_name() if hasattr(s, 'created_by') and s.created_by else "")
-        p.drawRightString(width - 40, y, f"{float(s.total_amount):.2f}")
-        y -= 12
-
-    p.showPage()
-    p.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="sales_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"'
-    return response
+    f = report_filters(request.GET)
+    return pdf_response(
+        write_sales_pdf, export_filename("sales", "pdf", f["start"], f["end"]),
+        start=f["start"], end=f["end"], sale_type=f["sale_type"], cashier=f["cashier"],
+    )
+
+
+# --------------------------
+# Background export jobs (rendered by `manage.py run_export_worker`)
+# --------------------------
+def _job_payload(job):
+    data = {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": reverse("export_job_status", args=[job.id]),
+    }
+    if job.status == ExportJob.DONE:
+        data["download_url"] = reverse("export_job_download", args=[job.id])
+    if job.status == ExportJob.FAILED:
+        data["error"] = "Export failed. Please try again or contact an admin."
+    return data
+
+
+def _own_job(request, job_id):
+    qs = ExportJob.objects.all()
+    if not request.user.is_superuser:
+        qs = qs.filter(created_by=request.user)
+    return get_object_or_404(qs, id=job_id)
+
+
+@login_required
+@has_any_group("SuperAdmin","Admin","Accountant")
+@require_POST
+def export_job_create(request, kind):
+    if kind not in EXPORT_KINDS:
+        raise Http404("Unknown export")
+    job = enqueue(kind, request.user, **report_filters(request.POST or request.GET))
+    return JsonResponse(_job_payload(job), status=202)
+
+
+@login_required
+@has_any_group("SuperAdmin","Admin","Accountant")
+def export_job_status(request, job_id):
+    return JsonResponse(_job_payload(_own_job(request, job_id)))
+
+
+@login_required
+@has_any_group("SuperAdmin","Admin","Accountant")
+def export_job_download(request, job_id):
+    job = _own_job(request, job_id)
+    if job.status != ExportJob.DONE or not job.file:
+        raise Http404("Export not ready")
+    return FileResponse(job.file.open("rb"), as_attachment=True, filename=os.path.basename(job.file.name))
 
  
+def _chart_params(request):
+    """?group=day|week|month and ?days=N, clamped to the group's maximum window."""
+    group = request.GET.get("group")
+    if group not in CHART_GROUPS:
+        group = "day"
+    try:
+        days = int(request.GET.get("days", 30))
+    except (TypeError, ValueError):
+        days = 30
+    return group, max(1, min(days, CHART_GROUPS[group]))
+
+
+def _chart_last_modified(request):
+    """
+    Latest write to DailySummary, the table the series are read from: every insert, edit
+    and delete of a sale / credit payment / expense bumps it, old dates included.
+    """
+    if not hasattr(request, "_chart_last_modified"):
+        request._chart_last_modified = summary_last_modified()
+    return request._chart_last_modified
+
+
+def _chart_etag(request):
+    group, days = _chart_params(request)
+    last = _chart_last_modified(request)
+    # the window moves at midnight even when no data changes
+    return f'"{group}-{days}-{timezone.localdate():%Y%m%d}-{last.timestamp() if last else 0}"'
+
+
+@login_required
+@has_any_group("SuperAdmin", "Admin", "Accountant")
+@condition(etag_func=_chart_etag, last_modified_func=_chart_last_modified)
 def chart_sales_vs_expenses(request):
-    # last 30 days
-    days = int(request.GET.get("days", 30))
-    labels = []
-    sales_data = []
-    expenses_data = []
-    today = datetime.today().date()
-    for i in range(days - 1, -1, -1):
-        day = today - timedelta(days=i)
-        labels.append(day.strftime("%Y-%m-%d"))
-        ds = Sale.objects.filter(timestamp__date=day).aggregate(total=Sum("total_amount"))["total"] or 0
-        de = Expense.objects.filter(timestamp__date=day).aggregate(total=Sum("amount"))["total"] or 0
-        sales_data.append(float(ds))
-        expenses_data.append(float(de))
-    return JsonResponse({"labels": labels, "sales": sales_data, "expenses": expenses_data})
+    group, days = _chart_params(request)
+    today = timezone.localdate()
+    rows = chart_series(today - timedelta(days=days - 1), today, group)
+    response = JsonResponse({
+        "group": group,
+        "labels": [r["date"].strftime("%Y-%m-%d") for r in rows],
+        "sales": [float(r["sales"]) for r in rows],
+        "expenses": [float(r["expenses"]) for r in rows],
+        "profit": [float(r["profit"]) for r in rows],
+        "credit_sales": [float(r["credit_sales"]) for r in rows],
+        "credit_outstanding": [float(r["credit_outstanding"]) for r in rows],
+    })
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
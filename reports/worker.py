@@ -0,0 +1,18 @@
+# reports/worker.py
+# Entry points for the export worker's child processes. Kept free of model imports
+# so a freshly spawned process can import this module before Django is set up.
+
+
+def init_process():
+    import django
+    django.setup()
+
+
+def run(job_id):
+    from django.db import connection
+    from reports.jobs import run_job
+
+    try:
+        return run_job(job_id)
+    finally:
+        connection.close()
@@ -2,7 +2,7 @@
 # from .models import Sale, SaleItem, CreditPayment
 
 from django.contrib import admin
-from .models import Sale, SaleItem, CreditPayment
+from .models import Sale, SaleItem, CreditPayment, SaleSubmission
 
 # @admin.register(Sale)
 # class SaleAdmin(admin.ModelAdmin):
@@ -57,6 +57,13 @@ class CreditPaymentAdmin(admin.ModelAdmin):
 #     ordering = ('-paid_on',)
 
 
+@admin.register(SaleSubmission)
+class SaleSubmissionAdmin(admin.ModelAdmin):
+    list_display = ('key', 'sale', 'created_by', 'created_at')
+    search_fields = ('key',)
+    raw_id_fields = ('sale', 'created_by')
+
+
 
 
 
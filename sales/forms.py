@@ -3,6 +3,7 @@ from decimal import Decimal
 from django import forms
 from .models import Sale, SaleItem, CreditPayment
 from inventory.models import Product, ProductWeightPrice
+from inventory.services import apply_weight_consumption
 
 class SaleForm(forms.ModelForm):
     amount_paid = forms.DecimalField(required=False, min_value=Decimal("0.00"))
@@ -32,8 +33,27 @@ class SaleForm(forms.ModelForm):
         return cleaned
 
 
+class PrefetchedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField that resolves submitted ids from a dict preloaded by the formset
+    (see SaleItemFormSet) instead of running one .get() per row.
+    """
+    prefetched = None
+
+    def to_python(self, value):
+        if self.prefetched is None or value in self.empty_values:
+            return super().to_python(value)
+        try:
+            return self.prefetched[int(value)]
+        except (KeyError, ValueError, TypeError):
+            raise forms.ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value}
+            )
+
+
 class SaleItemForm(forms.ModelForm):
-    weight_price = forms.ModelChoiceField(
+    product = PrefetchedModelChoiceField(queryset=Product.objects.with_available_kg())
+    weight_price = PrefetchedModelChoiceField(
         queryset=ProductWeightPrice.objects.filter(is_active=True),
         required=False
     )
@@ -42,11 +62,25 @@ class SaleItemForm(forms.ModelForm):
         model = SaleItem
         fields = ["product", "weight_price", "quantity", "unit_price"]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, catalog=None, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.fields["product"].queryset = Product.objects.all()
+        # available_kg comes with the product row, clean() needs no per-row stock maths
+        self.fields["product"].queryset = Product.objects.with_available_kg()
         # self.fields["unit_price"].widget.attrs["readonly"] = "readonly"
+        if catalog is not None:
+            # render the dropdowns from the cached POS catalog (inventory/catalog.py)
+            # instead of querying products and weight sizes for every row
+            for name, key in (("product", "product_choices"), ("weight_price", "weight_choices")):
+                field = self.fields[name]
+                field.widget.choices = [("", field.empty_label), *catalog[key]]
+
+    def _get_validation_exclusions(self):
+        # product / weight_price are already resolved from the database by their fields,
+        # skip the model's per-row FK existence checks
+        exclude = super()._get_validation_exclusions()
+        exclude.update({"product", "weight_price"})
+        return exclude
 
     def clean(self):
         cleaned = super().clean()
@@ -66,11 +100,18 @@ class SaleItemForm(forms.ModelForm):
                 raise forms.ValidationError("Selected weight size does not belong to the selected product.")
             if not product.is_weighted:
                 raise forms.ValidationError("This product is not configured for weight-based sales.")
-              # ✅ important: stock check in kg
+            # ✅ important: stock check in kg (available_kg from the queryset, then a dry run
+            # of the same engine create_sale uses for the box configuration)
             total_kg = (Decimal(weight_price.weight_kg) * Decimal(qty)).quantize(Decimal("0.01"))
-            available_kg = product.available_weight_kg()
+            available_kg = getattr(product, "available_kg", None)
+            if available_kg is None:
+                available_kg = product.available_weight_kg()
             if total_kg > available_kg:
                 raise forms.ValidationError(f"Not enough kg in stock. Available: {available_kg}kg")
+            try:
+                apply_weight_consumption(product, total_kg, dry_run=True)
+            except ValueError as e:
+                raise forms.ValidationError(str(e))
 
         else:
              # unit sale
@@ -120,6 +161,41 @@ class SaleItemForm(forms.ModelForm):
 #         return cleaned
 
 
+class SaleItemFormSet(forms.BaseFormSet):
+    """
+    Loads every product / weight price referenced by the submitted rows in two queries,
+    so validating a 30-line order costs the same as a 1-line order.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prefetched = None
+
+    def _submitted_ids(self, field):
+        ids = set()
+        for i in range(self.total_form_count()):
+            value = self.data.get(f"{self.add_prefix(i)}-{field}")
+            if value and str(value).isdigit():
+                ids.add(int(value))
+        return ids
+
+    def _prefetch(self):
+        if self._prefetched is None:
+            form = self.form()
+            self._prefetched = {
+                name: form.fields[name].queryset.in_bulk(self._submitted_ids(name))
+                for name in ("product", "weight_price")
+            }
+        return self._prefetched
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        if self.is_bound:
+            for name, objs in self._prefetch().items():
+                form.fields[name].prefetched = objs
+        return form
+
+
 class CreditPaymentForm(forms.ModelForm):
     class Meta:
         model = CreditPayment
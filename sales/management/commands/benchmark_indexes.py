@@ -0,0 +1,228 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from assets.models import Vehicle, VehicleTransaction
+from employees.models import AttendanceLog, EmployeeProfile
+from expenses.models import Expense
+from finance.models import BankAccount, BankTransaction
+from finance.services import current_balance
+from sales.models import Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway sales/expenses/bank/vehicle/attendance dataset and print EXPLAIN plans and "
+        "timings of the hot list/dashboard queries with and without the Meta.indexes. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sales", type=int, default=1_000_000, help="number of sales to seed")
+        parser.add_argument("--ledger-rows", type=int, default=100_000,
+                            help="bank transactions, vehicle transactions and attendance logs to seed (each)")
+        parser.add_argument("--days", type=int, default=730, help="spread sales over this many days")
+        parser.add_argument("--repeat", type=int, default=5, help="runs per query (best time is reported)")
+        parser.add_argument("--batch", type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        models = [Sale, Expense, BankTransaction, VehicleTransaction, AttendanceLog]
+        with transaction.atomic():
+            users = self._seed(opts["sales"], opts["days"], opts["batch"])
+            ledgers = self._seed_ledgers(users, opts["ledger_rows"], opts["days"], opts["batch"])
+            cases = self._cases(users[0], *ledgers)
+
+            self._analyze(models)
+            self._set_indexes(models, present=False)
+            before = self._run(cases, opts["repeat"])
+
+            self._set_indexes(models, present=True)
+            self._analyze(models)
+            after = self._run(cases, opts["repeat"])
+
+            transaction.set_rollback(True)
+
+        for label, _ in cases:
+            b_ms, b_plan = before[label]
+            a_ms, a_plan = after[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  before: {b_ms:9.2f} ms   after: {a_ms:9.2f} ms   ({b_ms / max(a_ms, 0.001):.1f}x)")
+            self.stdout.write("  plan before:")
+            self.stdout.write("\n".join(f"    {line}" for line in b_plan))
+            self.stdout.write("  plan after:")
+            self.stdout.write("\n".join(f"    {line}" for line in a_plan))
+        self.stdout.write(self.style.SUCCESS("Done (seeded data rolled back)"))
+
+    # --------------------------
+    # Dataset
+    # --------------------------
+    def _seed(self, n_sales, days, batch):
+        rng = random.Random(42)
+        users = [User.objects.create(username=f"bench_user_{i}_{time.time_ns()}") for i in range(5)]
+        now = timezone.now()
+        span = days * 86400
+
+        # the seeded history needs real past timestamps, so lift auto_now_add while inserting
+        fields = [Sale._meta.get_field("timestamp"), Expense._meta.get_field("timestamp")]
+        for f in fields:
+            f.auto_now_add = False
+        try:
+            started = time.perf_counter()
+            for offset in range(0, n_sales, batch):
+                rows = []
+                for _ in range(min(batch, n_sales - offset)):
+                    total = Decimal(rng.randint(500, 50000)) / 100
+                    is_credit = rng.random() < 0.1
+                    rows.append(Sale(
+                        created_by=rng.choice(users),
+                        sale_type=rng.choice(("retail", "wholesale")),
+                        payment_method="credit" if is_credit else "cash",
+                        is_credit=is_credit,
+                        subtotal_amount=total,
+                        total_amount=total,
+                        amount_paid=Decimal("0.00") if is_credit else total,
+                        timestamp=now - timedelta(seconds=rng.randrange(span)),
+                    ))
+                Sale.objects.bulk_create(rows)
+
+            Expense.objects.bulk_create(
+                [
+                    Expense(
+                        amount=Decimal(rng.randint(100, 20000)) / 100,
+                        created_by=rng.choice(users),
+                        timestamp=now - timedelta(seconds=rng.randrange(span)),
+                    )
+                    for _ in range(max(n_sales // 10, 1))
+                ],
+                batch_size=batch,
+            )
+        finally:
+            for f in fields:
+                f.auto_now_add = True
+
+        self.stdout.write(f"Seeded {n_sales} sales in {time.perf_counter() - started:.1f}s")
+        return users
+
+    def _seed_ledgers(self, users, n_rows, days, batch):
+        """A few bank accounts, vehicles and employees sharing n_rows each; returns one of each."""
+        rng = random.Random(7)
+        today = timezone.localdate()
+        now = timezone.now()
+        started = time.perf_counter()
+
+        accounts = [BankAccount.objects.create(name=f"bench_account_{i}") for i in range(5)]
+        vehicles = [Vehicle.objects.create(name="bench", plate_number=f"BENCH-{i}-{time.time_ns()}") for i in range(5)]
+        employees = [EmployeeProfile.objects.create(user=u, full_name=u.username) for u in users]
+
+        # bulk_create skips BankTransaction.save, so no balance reflow per row
+        BankTransaction.objects.bulk_create(
+            [
+                BankTransaction(
+                    account=rng.choice(accounts), tx_type=rng.choice(("credit", "debit")), title="bench",
+                    amount=Decimal(rng.randint(100, 500000)) / 100, date=today - timedelta(days=rng.randrange(days)),
+                )
+                for _ in range(n_rows)
+            ],
+            batch_size=batch,
+        )
+        VehicleTransaction.objects.bulk_create(
+            [
+                VehicleTransaction(
+                    vehicle=rng.choice(vehicles), tx_type=rng.choice(("income", "expense")), title="bench",
+                    amount=Decimal(rng.randint(100, 100000)) / 100, date=today - timedelta(days=rng.randrange(days)),
+                )
+                for _ in range(n_rows)
+            ],
+            batch_size=batch,
+        )
+        logs = []
+        for _ in range(n_rows):
+            clock_in = now - timedelta(seconds=rng.randrange(days * 86400))
+            logs.append(AttendanceLog(employee=rng.choice(employees), clock_in=clock_in,
+                                      clock_out=clock_in + timedelta(hours=rng.randint(4, 10))))
+        # today's shift: everyone still clocked in
+        logs += [AttendanceLog(employee=e, clock_in=now - timedelta(hours=2)) for e in employees]
+        AttendanceLog.objects.bulk_create(logs, batch_size=batch)
+
+        self.stdout.write(f"Seeded {n_rows} bank/vehicle/attendance rows each in {time.perf_counter() - started:.1f}s")
+        return accounts[0], vehicles[0], employees[0]
+
+    def _cases(self, user, account, vehicle, employee):
+        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        month_ago = today - timedelta(days=30)
+        return [
+            ("dashboard: sales total, last 30 days",
+             lambda: Sale.objects.filter(timestamp__gte=month_ago).aggregate(s=Sum("total_amount"), n=Count("id"))),
+            ("sale list: newest 25",
+             lambda: list(Sale.objects.order_by("-timestamp", "-id")[:25])),
+            ("retail list: newest 25",
+             lambda: list(Sale.objects.filter(sale_type="retail").order_by("-timestamp", "-id")[:25])),
+            ("open credit sales: newest 25",
+             lambda: list(Sale.objects.filter(is_credit=True, total_amount__gt=F("amount_paid")).order_by("-timestamp")[:25])),
+            ("cashier: own sales today",
+             lambda: Sale.objects.filter(created_by=user, timestamp__gte=today).aggregate(s=Sum("total_amount"))),
+            ("expenses: total, last 30 days",
+             lambda: Expense.objects.filter(timestamp__gte=month_ago).aggregate(s=Sum("amount"))),
+            ("bank account: current balance",
+             lambda: current_balance(account)),
+            ("bank account: month totals",
+             lambda: account.transactions.filter(date__gte=month_ago.date()).aggregate(
+                 credits=Sum("amount", filter=Q(tx_type="credit")), debits=Sum("amount", filter=Q(tx_type="debit")))),
+            ("vehicle: newest 25 transactions",
+             lambda: list(vehicle.transactions.all()[:25])),
+            ("vehicle: income total",
+             lambda: vehicle.transactions.filter(tx_type="income").aggregate(s=Sum("amount"))),
+            ("attendance: employee's open log",
+             lambda: AttendanceLog.objects.filter(employee=employee, clock_out__isnull=True).order_by("-clock_in").first()),
+            ("attendance: clocked-in employees",
+             lambda: list(AttendanceLog.objects.filter(clock_out__isnull=True).values_list("employee_id", flat=True))),
+        ]
+
+    # --------------------------
+    # Measuring
+    # --------------------------
+    def _run(self, cases, repeat):
+        results = {}
+        for label, query in cases:
+            with CaptureQueriesContext(connection) as ctx:
+                query()
+            sql = ctx.captured_queries[-1]["sql"]
+
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                elapsed = (time.perf_counter() - started) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, self._explain(sql))
+        return results
+
+    def _explain(self, sql):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            rows = cursor.fetchall()
+        # sqlite: (id, parent, notused, detail); postgres: (line,)
+        return [str(r[-1]) for r in rows]
+
+    def _analyze(self, models):
+        with connection.cursor() as cursor:
+            for model in models:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+    def _set_indexes(self, models, present):
+        # plain DDL through the cursor: the SQLite schema editor refuses to run inside atomic()
+        editor = connection.schema_editor()
+        editor.deferred_sql = []
+        with connection.cursor() as cursor:
+            for model in models:
+                for index in model._meta.indexes:
+                    sql = index.create_sql(model, editor) if present else index.remove_sql(model, editor)
+                    cursor.execute(str(sql))
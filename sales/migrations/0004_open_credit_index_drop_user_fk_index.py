@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_sale_submission'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='sale_open_credit_idx',
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('is_credit', True), ('total_amount__gt', models.F('amount_paid'))), fields=['timestamp'], name='sale_open_credit_idx'),
+        ),
+    ]
@@ -1,13 +1,15 @@
 # sales/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from inventory.models import Product, ProductWeightPrice
 from decimal import Decimal
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import F, Q, Sum
 
 
 
+# what Sale.save needs of the stored row to update the daily summary (analytics.services)
+SUMMARY_SALE_FIELDS = ("timestamp", "sale_type", "created_by", "total_amount", "is_credit", "amount_paid")
 
 
 class Sale(models.Model):
@@ -23,7 +25,8 @@ class Sale(models.Model):
         ("wholesale", "Wholesale"),
     ]
 
-    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    # no single-column index: sale_user_ts_idx (created_by, timestamp) serves created_by lookups
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, db_index=False)
     sale_type = models.CharField(max_length=20, choices=SALE_TYPES, default="retail")
 
     customer_name = models.CharField(max_length=100, blank=True, null=True)
@@ -47,6 +50,21 @@ class Sale(models.Model):
 
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # date-range filters + newest-first lists (id breaks ties for keyset paging)
+            models.Index(fields=["timestamp", "id"], name="sale_ts_id_idx"),
+            models.Index(fields=["sale_type", "timestamp"], name="sale_type_ts_idx"),
+            models.Index(fields=["created_by", "timestamp"], name="sale_user_ts_idx"),
+            # open credit sales only (a small slice of the table): the exact predicate of
+            # credit_sales_list, so the planner can match it to the query
+            models.Index(
+                fields=["timestamp"],
+                condition=Q(is_credit=True, total_amount__gt=F("amount_paid")),
+                name="sale_open_credit_idx",
+            ),
+        ]
+
     @property
     def balance_due_calc(self):
         return max(Decimal("0.00"), (self.total_amount or Decimal("0.00")) - (self.amount_paid or Decimal("0.00")))
@@ -55,6 +73,16 @@ class Sale(models.Model):
     def is_paid(self):
         return self.balance_due_calc <= Decimal("0.00")
 
+    def save(self, *args, **kwargs):
+        from analytics.services import record_sale
+
+        # the summary takes the difference against the stored row: edits and
+        # re-saves (totals, credit payments) never count a sale twice
+        with transaction.atomic():
+            before = None if self._state.adding else Sale.objects.only(*SUMMARY_SALE_FIELDS).filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            record_sale(before, self)
+
     def recalc_credit(self, save=False):
         total_paid = self.credit_payments.aggregate(s=Sum("amount"))["s"] or Decimal("0.00")
         self.amount_paid = Decimal(total_paid)
@@ -89,6 +117,19 @@ class SaleItem(models.Model):
     def line_total(self):
         return Decimal(self.quantity or 0) * Decimal(self.unit_price or Decimal("0.00"))
 
+    def save(self, *args, **kwargs):
+        # commit_sale_items bulk-creates and records items itself; this covers admin edits
+        from analytics.services import record_sale_items
+
+        with transaction.atomic():
+            before = None
+            if not self._state.adding:
+                before = SaleItem.objects.select_related("sale", "weight_price").filter(pk=self.pk).first()
+            super().save(*args, **kwargs)
+            if before is not None:
+                record_sale_items(before.sale, [before], sign=-1)
+            record_sale_items(self.sale, [self])
+
     def __str__(self):
         pname = self.product.name if self.product else "Deleted Product"
         if self.weight_price:
@@ -112,13 +153,70 @@ class CreditPayment(models.Model):
         ordering = ["-paid_on"]
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        self.sale.recalc_credit(save=True)
+        # Sale.save carries the new amount_paid into the daily summary
+        with transaction.atomic():
+            previous_sale_id = None
+            if not self._state.adding:
+                previous_sale_id = CreditPayment.objects.filter(pk=self.pk).values_list("sale_id", flat=True).first()
+            super().save(*args, **kwargs)
+            self.sale.recalc_credit(save=True)
+            if previous_sale_id not in (None, self.sale_id):
+                # moved to another sale in the admin
+                Sale.objects.get(pk=previous_sale_id).recalc_credit(save=True)
 
     def __str__(self):
         return f"Payment ₵{self.amount} for Sale #{self.sale_id}"
 
 
+class SaleSubmission(models.Model):
+    """
+    Idempotency key sent by a till with each queued sale (sales batch API).
+    The unique index makes a replayed key a single lookup and a no-op.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    # SET_NULL: replaying the key of a deleted sale must not bring it back
+    sale = models.ForeignKey(Sale, on_delete=models.SET_NULL, null=True, related_name="submissions")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} -> Sale #{self.sale_id}"
+
+
+# Daily summary on deletes (saves are handled in the save() methods above).
+# Deleting a sale cascades to its items and payments: the sale takes its items out of
+# the product rollup and its totals out of the summary itself, so the cascaded rows
+# are skipped instead of re-saving a sale that is about to go.
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+
+def _cascaded_from_sale(origin):
+    return isinstance(origin, Sale) or getattr(origin, "model", None) is Sale
+
+
+@receiver(pre_delete, sender=Sale)
+def sale_deleted(sender, instance, **kwargs):
+    from analytics.services import record_sale, record_sale_items
+
+    record_sale(instance, None)
+    record_sale_items(instance, instance.items.select_related("weight_price"), sign=-1)
+
+
+@receiver(post_delete, sender=SaleItem)
+def sale_item_deleted(sender, instance, origin=None, **kwargs):
+    from analytics.services import record_sale_items
+
+    if not _cascaded_from_sale(origin):
+        record_sale_items(instance.sale, [instance], sign=-1)
+
+
+@receiver(post_delete, sender=CreditPayment)
+def credit_payment_deleted(sender, instance, origin=None, **kwargs):
+    if not _cascaded_from_sale(origin):
+        instance.sale.recalc_credit(save=True)
+
+
 
 
 #  # sales/models.py
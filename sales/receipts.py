@@ -0,0 +1,208 @@
+# sales/receipts.py
+"""
+Receipt rendering (PDF + QR) with the artifacts kept under MEDIA_ROOT/receipts/<sale id>/.
+
+Files are named by a hash of everything printed on the receipt, credit payments included,
+so a reprint of an unchanged sale is a file read and a paid-off credit sale gets a new file
+(and a new ETag) on its next print.
+"""
+import hashlib
+from io import BytesIO
+
+import qrcode
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import DecimalField, ExpressionWrapper, F, Prefetch
+from reportlab.lib.pagesizes import A5, landscape
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .models import CreditPayment, SaleItem
+
+PAGE_SIZE = landscape(A5)
+
+
+def receipt_sales(qs):
+    """Sales with everything a receipt prints: items, products and weight sizes in one prefetch each."""
+    items = (
+        SaleItem.objects.select_related("product", "weight_price")
+        .annotate(line_total_amount=ExpressionWrapper(
+            F("quantity") * F("unit_price"),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ))
+        .order_by("id")
+    )
+    payments = CreditPayment.objects.only("id", "sale_id", "amount", "paid_on").order_by("id")
+    return qs.select_related("created_by").prefetch_related(
+        Prefetch("items", queryset=items),
+        Prefetch("credit_payments", queryset=payments),
+    )
+
+
+def receipt_version(sale):
+    """Content hash of a (receipt_sales-loaded) sale."""
+    parts = [
+        sale.id, sale.timestamp.isoformat(), sale.created_by_id, sale.customer_name, sale.payment_method,
+        sale.discount, sale.apply_vat, sale.subtotal_amount, sale.vat_amount, sale.total_amount,
+        sale.is_credit, sale.amount_paid, sale.due_date,
+    ]
+    for it in sale.items.all():
+        parts += [it.id, _item_name(it), it.quantity, it.unit_price]
+    for pay in sale.credit_payments.all():
+        parts += [pay.id, pay.amount]
+    return hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+def _item_name(it):
+    name = it.product.name if it.product else "Deleted Product"
+    if it.weight_price:
+        name = f"{name} ({it.weight_price.weight_kg:g}kg)"
+    return name
+
+
+def _cashier(sale):
+    if not sale.created_by:
+        return "—"
+    return sale.created_by.get_full_name() or sale.created_by.username
+
+
+def _path(sale, version, ext):
+    return f"receipts/{sale.id}/{version}.{ext}"
+
+
+def _store(path, data):
+    """Save under the exact name and drop older versions of the same sale."""
+    folder = path.rsplit("/", 1)[0]
+    if default_storage.exists(folder):
+        _, files = default_storage.listdir(folder)
+        keep = path.rsplit("/", 1)[1].rsplit(".", 1)[0]
+        for name in files:
+            if not name.startswith(keep):
+                default_storage.delete(f"{folder}/{name}")
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(data))
+
+
+def qr_png(sale, version=None):
+    """PNG bytes of the receipt QR code, generated once per sale version."""
+    version = version or receipt_version(sale)
+    path = _path(sale, version, "png")
+    if default_storage.exists(path):
+        with default_storage.open(path, "rb") as f:
+            return f.read()
+
+    qr_text = f"Receipt:CS-{sale.id:04d}|Amount:₵{float(sale.total_amount):.2f}|Date:{sale.timestamp.strftime('%Y-%m-%d %H:%M')}"
+    buf = BytesIO()
+    qrcode.make(qr_text).save(buf, format="PNG")
+    data = buf.getvalue()
+    _store(path, data)
+    return data
+
+
+def draw_receipt(p, sale, qr=None):
+    """Draw one receipt onto canvas `p`, ending with showPage()."""
+    width, height = PAGE_SIZE
+
+    p.setFont("Helvetica-Bold", 14)
+    p.drawCentredString(width/2, height - 20, "❄️ FRESH CHILL COLD STORE ❄️")
+    p.setFont("Helvetica", 9)
+    p.drawCentredString(width/2, height - 34, "Accra - Ghana | Tel: +233 20 854 3630")
+
+    y = height - 56
+    p.setFont("Helvetica", 8)
+    p.drawString(20, y, f"Date: {sale.timestamp.strftime('%Y-%m-%d %H:%M')}")
+    p.drawRightString(width - 20, y, f"Receipt: CS-{sale.id:04d}")
+    y -= 14
+
+    p.drawString(20, y, f"Cashier: {_cashier(sale)}")
+    y -= 12
+    p.drawString(20, y, f"Customer: {sale.customer_name or 'Walk-in Customer'}")
+    y -= 12
+    p.drawString(20, y, f"Payment: {sale.get_payment_method_display()}")
+
+    y -= 18
+    p.setFont("Helvetica-Bold", 9)
+    p.drawString(20, y, "Item")
+    p.drawRightString(220, y, "Qty")
+    p.drawRightString(290, y, "Price (₵)")
+    p.drawRightString(370, y, "Total (₵)")
+    p.line(15, y-2, width-15, y-2)
+    y -= 12
+    p.setFont("Helvetica", 9)
+
+    for it in sale.items.all():
+        p.drawString(20, y, _item_name(it)[:32])
+        p.drawRightString(220, y, str(it.quantity))
+        p.drawRightString(290, y, f"{float(it.unit_price):.2f}")
+        p.drawRightString(370, y, f"{float(it.line_total()):.2f}")
+        y -= 12
+        if y < 70:
+            p.showPage()
+            y = height - 40
+            p.setFont("Helvetica", 9)
+
+    y -= 6
+    p.line(15, y, width-15, y)
+    y -= 14
+
+    p.drawRightString(320, y, "Subtotal:")
+    p.drawRightString(370, y, f"₵{float(sale.subtotal_amount):.2f}")
+    y -= 12
+
+    if sale.apply_vat:
+        p.drawRightString(320, y, "VAT (4%):")
+        p.drawRightString(370, y, f"₵{float(sale.vat_amount):.2f}")
+        y -= 12
+
+    p.setFont("Helvetica-Bold", 10)
+    p.drawRightString(320, y, "Total:")
+    p.drawRightString(370, y, f"₵{float(sale.total_amount):.2f}")
+
+    if sale.is_credit or sale.credit_payments.all():
+        y -= 12
+        p.setFont("Helvetica", 9)
+        p.drawRightString(320, y, "Paid:")
+        p.drawRightString(370, y, f"₵{float(sale.amount_paid):.2f}")
+        y -= 12
+        p.drawRightString(320, y, "Balance:")
+        p.drawRightString(370, y, f"₵{float(sale.balance_due_calc):.2f}")
+
+    if qr:
+        p.drawImage(ImageReader(BytesIO(qr)), width - 120, 20, width=80, height=80)
+
+    p.setFont("Helvetica-Oblique", 8)
+    p.drawCentredString(width/2, 18, "Thank you for your purchase! — Fresh Chill Cold Store")
+
+    p.showPage()
+
+
+def receipt_pdf(sale):
+    """(storage path, version) of the sale's receipt PDF, rendering it only if this version is new."""
+    version = receipt_version(sale)
+    path = _path(sale, version, "pdf")
+    if not default_storage.exists(path):
+        buf = BytesIO()
+        p = canvas.Canvas(buf, pagesize=PAGE_SIZE)
+        try:
+            qr = qr_png(sale, version)
+        except Exception:
+            qr = None
+        draw_receipt(p, sale, qr)
+        p.save()
+        _store(path, buf.getvalue())
+    return path, version
+
+
+def write_receipts_pdf(qs, fileobj, chunk_size=100):
+    """
+    Every sale of `qs` as consecutive receipts in one PDF. Sales are read in chunks with
+    their items/products/payments prefetched per chunk: three queries per 100 receipts.
+    """
+    p = canvas.Canvas(fileobj, pagesize=PAGE_SIZE)
+    for sale in receipt_sales(qs).iterator(chunk_size=chunk_size):
+        try:
+            qr = qr_png(sale)
+        except Exception:
+            qr = None
+        draw_receipt(p, sale, qr)
+    p.save()
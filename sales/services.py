@@ -0,0 +1,269 @@
+# sales/services.py
+from decimal import Decimal, InvalidOperation
+from django.db import IntegrityError, transaction
+from django.forms import formset_factory
+
+from analytics.services import record_sale_items
+from inventory.models import Product, ProductWeightPrice
+from inventory.services import apply_weight_consumption, move_stock_bulk
+from .models import SaleItem, CreditPayment, SaleSubmission
+
+VAT_RATE = Decimal("0.04")  # 4%
+ZERO = Decimal("0.00")
+
+
+def _unit_price(obj, sale_type):
+    # works for both Product (unit_price/wholesale_price) and ProductWeightPrice (retail_price/wholesale_price)
+    if sale_type == "wholesale":
+        return obj.wholesale_price
+    return obj.retail_price if isinstance(obj, ProductWeightPrice) else obj.unit_price
+
+
+def _quantity(qty):
+    """Whole number of packs/units; 1.9 or "x" is rejected rather than truncated."""
+    try:
+        value = Decimal(str(qty if qty is not None else 0))
+        if value == value.to_integral_value():
+            return int(value)
+    except (InvalidOperation, OverflowError, ValueError):
+        pass
+    raise ValueError(f"Quantity must be a whole number (got {qty!r}).")
+
+
+@transaction.atomic
+def commit_sale_items(*, sale, lines, sale_type):
+    """
+    Price and deduct stock for every line of a saved sale in a constant number of queries:
+    - one SELECT ... FOR UPDATE for all products, ordered by id so concurrent sales
+      always lock rows in the same order (no deadlocks)
+    - one SELECT for all (active) weight prices
+    - deductions checked in memory, then one bulk_create (items), one F()-expression
+      UPDATE for unit stock and one bulk_update for boxed-weight stock
+
+    `lines` is an iterable of (product_id, weight_price_id or None, qty).
+    Returns (items, subtotal). Raises ValueError when stock or configuration is wrong.
+    """
+    lines = [(int(pid), int(wpid) if wpid else None, _quantity(qty)) for pid, wpid, qty in lines]
+    if not lines:
+        return [], ZERO
+
+    products = {
+        p.id: p
+        for p in Product.objects.select_for_update().filter(id__in={pid for pid, _, _ in lines}).order_by("id")
+    }
+    wp_ids = {wpid for _, wpid, _ in lines if wpid}
+    # same rule as SaleItemForm.weight_price: a deactivated size cannot be sold
+    weight_prices = ProductWeightPrice.objects.filter(is_active=True).in_bulk(wp_ids) if wp_ids else {}
+
+    items = []
+    weighted = set()
+    unit_deltas = {}
+    subtotal = ZERO
+
+    for pid, wpid, qty in lines:
+        product = products.get(pid)
+        if product is None:
+            raise ValueError("A selected product no longer exists.")
+        if qty <= 0:
+            raise ValueError(f"Quantity for {product.name} must be at least 1.")
+
+        item = SaleItem(sale=sale, product=product, quantity=qty)
+
+        # ✅ CASE 1: Weight sale (fish)
+        if wpid:
+            wp = weight_prices.get(wpid)
+            if wp is None:
+                raise ValueError(f"Selected weight size of {product.name} is not available.")
+            if wp.product_id != pid:
+                raise ValueError(f"Selected weight size does not belong to {product.name}.")
+
+            # force correct pricing server-side
+            item.weight_price = wp
+            item.unit_price = _unit_price(wp, sale_type)
+
+            apply_weight_consumption(product, Decimal(qty) * Decimal(wp.weight_kg))
+            weighted.add(pid)
+
+        # ✅ CASE 2: Normal unit sale (sausage)
+        else:
+            if product.is_weighted:
+                # If weighted product but user didn’t choose weight size, block it
+                raise ValueError(f"{product.name} is weighted. Please select a weight size.")
+            if qty > product.quantity:
+                raise ValueError(f"Not enough stock for {product.name}. Available: {product.quantity}")
+
+            item.unit_price = _unit_price(product, sale_type)
+            product.quantity -= qty
+            unit_deltas[pid] = unit_deltas.get(pid, 0) - qty
+
+        items.append(item)
+        subtotal += item.line_total()
+
+    SaleItem.objects.bulk_create(items)
+    record_sale_items(sale, items)
+    # unit stock: one F()-expression UPDATE; boxed stock: one bulk_update of the box fields
+    move_stock_bulk(unit_deltas)
+    Product.objects.bulk_update(
+        [products[pid] for pid in sorted(weighted)],
+        ["boxes_in_stock", "box_remaining_kg"],
+    )
+    return items, subtotal
+
+
+@transaction.atomic
+def commit_sale(*, sale, lines, sale_type, user, amount_paid=ZERO):
+    """
+    Full sale-commit pipeline used by the POS:
+    save the sale, write its items and stock deductions, compute totals (discount/VAT),
+    update the daily summary and record the credit down-payment if any.
+    """
+    sale.created_by = user
+    sale.sale_type = sale_type
+    sale.is_credit = (sale.payment_method == "credit")
+    sale.save()
+
+    items, subtotal = commit_sale_items(sale=sale, lines=lines, sale_type=sale_type)
+
+    # totals
+    discount = Decimal(sale.discount or ZERO)
+    after_discount = max(ZERO, subtotal - discount)
+
+    vat = (after_discount * VAT_RATE).quantize(Decimal("0.01")) if sale.apply_vat else ZERO
+    grand = (after_discount + vat).quantize(Decimal("0.01"))
+
+    sale.subtotal_amount = after_discount
+    sale.vat_amount = vat
+    sale.total_amount = grand
+    # Sale.save keeps the daily summary in step with every save below
+    sale.save(update_fields=["subtotal_amount", "vat_amount", "total_amount"])
+
+    # credit
+    if sale.is_credit:
+        amount_paid = max(ZERO, min(Decimal(amount_paid or ZERO), grand))
+        if amount_paid > 0:
+            CreditPayment.objects.create(
+                sale=sale,
+                amount=amount_paid,
+                payment_method="cash",
+                reference="",
+                received_by=user,
+            )
+        sale.recalc_credit(save=True)
+    else:
+        # fully paid
+        sale.amount_paid = sale.total_amount
+        sale.save(update_fields=["amount_paid"])
+
+    return sale
+
+
+def _error(key, *messages):
+    return {"key": key, "status": "error", "errors": list(messages)}
+
+
+def _form_errors(form, prefix=""):
+    return [
+        f"{prefix}{msg}" if field == "__all__" else f"{prefix}{field}: {msg}"
+        for field, msgs in form.errors.items() for msg in msgs
+    ]
+
+
+def _item_formset_data(items):
+    """The POST data create_sale receives for these lines (unit_price is re-priced server-side)."""
+    data = {"form-TOTAL_FORMS": str(len(items)), "form-INITIAL_FORMS": "0"}
+    for i, item in enumerate(items):
+        data[f"form-{i}-product"] = item["product"]
+        data[f"form-{i}-weight_price"] = item.get("weight_price") or ""
+        data[f"form-{i}-quantity"] = item["quantity"]
+        data[f"form-{i}-unit_price"] = ZERO
+    return data
+
+
+@transaction.atomic
+def commit_sale_batch(*, entries, user, sale_type):
+    """
+    Commit the sales a till queued while offline, in one transaction.
+
+    Each entry is {"key": <client idempotency key>, "sale": {SaleForm fields},
+    "items": [{"product": id, "weight_price": id or null, "quantity": n}, ...]}.
+    Header and lines are validated by SaleForm and SaleItemFormSet exactly as on the POS
+    screen. Every sale runs in its own savepoint through commit_sale, so a sale that fails
+    validation or stock is rolled back alone and reported while the others commit.
+    A key that was already committed (a retry, a double click) changes nothing and
+    reports the original sale.
+
+    Returns one {"key", "status": "created" | "duplicate" | "error", ...} per entry, in order.
+    """
+    from .forms import SaleForm, SaleItemForm, SaleItemFormSet
+
+    ItemFormSet = formset_factory(SaleItemForm, formset=SaleItemFormSet, extra=0)
+
+    keys = [str(entry.get("key") or "").strip() for entry in entries]
+    done = dict(
+        SaleSubmission.objects.filter(key__in={k for k in keys if k}).values_list("key", "sale_id")
+    )
+
+    results = []
+    for key, entry in zip(keys, entries):
+        if not key or len(key) > SaleSubmission._meta.get_field("key").max_length:
+            results.append(_error(key, "Missing or invalid idempotency key."))
+            continue
+        if key in done:
+            results.append({"key": key, "status": "duplicate", "sale_id": done[key]})
+            continue
+
+        header = entry.get("sale") or {}
+        if not isinstance(header, dict):
+            results.append(_error(key, "\"sale\" must be an object."))
+            continue
+        # the POS always posts a discount; a till may leave it out
+        form = SaleForm({"discount": ZERO, **header})
+        if not form.is_valid():
+            results.append(_error(key, *_form_errors(form)))
+            continue
+        items = entry.get("items") or []
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict) and item.get("product") not in (None, "") and item.get("quantity") not in (None, "")
+            for item in items
+        ):
+            results.append(_error(key, "Each item needs a product and a quantity."))
+            continue
+        if not items:
+            results.append(_error(key, "A sale needs at least one item."))
+            continue
+        formset = ItemFormSet(_item_formset_data(items))
+        if not formset.is_valid():
+            results.append(_error(key, *(
+                msg for n, f in enumerate(formset, start=1) for msg in _form_errors(f, f"Item {n}: ")
+            )))
+            continue
+        lines = [
+            (f.cleaned_data["product"].id, getattr(f.cleaned_data.get("weight_price"), "id", None), f.cleaned_data["quantity"])
+            for f in formset
+        ]
+
+        try:
+            with transaction.atomic():
+                sale = commit_sale(
+                    sale=form.save(commit=False),
+                    lines=lines,
+                    sale_type=sale_type,
+                    user=user,
+                    amount_paid=form.cleaned_data.get("amount_paid") or ZERO,
+                )
+                # claimed last: a concurrent flush of the same key rolls this sale back
+                SaleSubmission.objects.create(key=key, sale=sale, created_by=user)
+        except IntegrityError:
+            claimed = list(SaleSubmission.objects.filter(key=key).values_list("sale_id", flat=True)[:1])
+            if not claimed:
+                raise
+            sale_id = done[key] = claimed[0]
+            results.append({"key": key, "status": "duplicate", "sale_id": sale_id})
+            continue
+        except (ValueError, TypeError) as e:
+            results.append(_error(key, str(e)))
+            continue
+
+        done[key] = sale.id
+        results.append({"key": key, "status": "created", "sale_id": sale.id, "total": str(sale.total_amount)})
+    return results
@@ -1,3 +1,93 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from inventory.models import Product, ProductWeightPrice
+from .models import Sale
+from .services import commit_sale_batch, commit_sale_items
+
+
+class SaleBatchValidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("till")
+        self.fish = Product.objects.create(
+            name="Tilapia", sku="F1", unit_price=Decimal("0.00"), is_weighted=True,
+            track_method="boxed_weight", box_weight_kg=Decimal("30.00"), boxes_in_stock=5,
+            box_remaining_kg=Decimal("30.00"),
+        )
+        self.size = ProductWeightPrice.objects.create(
+            product=self.fish, weight_kg=Decimal("5.00"), retail_price=Decimal("12.00"),
+            wholesale_price=Decimal("10.00"),
+        )
+        self.sausage = Product.objects.create(name="Sausage", sku="S1", unit_price=Decimal("3.00"), quantity=10)
+
+    def flush(self, *items, key="k1"):
+        entry = {"key": key, "sale": {"payment_method": "cash"}, "items": list(items)}
+        return commit_sale_batch(entries=[entry], user=self.user, sale_type="retail")[0]
+
+    def test_valid_lines_commit(self):
+        result = self.flush(
+            {"product": self.fish.id, "weight_price": self.size.id, "quantity": 2},
+            {"product": self.sausage.id, "quantity": "3"},
+        )
+        self.assertEqual((result["status"], result["total"]), ("created", "33.00"))
+        self.sausage.refresh_from_db()
+        self.assertEqual(self.sausage.quantity, 7)
+
+    def test_inactive_weight_size_is_rejected(self):
+        self.size.is_active = False
+        self.size.save()
+        result = self.flush({"product": self.fish.id, "weight_price": self.size.id, "quantity": 2})
+        self.assertEqual(result["status"], "error")
+        self.assertTrue(result["errors"][0].startswith("Item 1: weight_price:"))
+        self.assertFalse(Sale.objects.exists())
+
+    def test_fractional_quantity_is_rejected(self):
+        result = self.flush({"product": self.sausage.id, "quantity": 1.9})
+        self.assertIn("Item 1: quantity: Enter a whole number.", result["errors"])
+        self.assertFalse(Sale.objects.exists())
+        self.sausage.refresh_from_db()
+        self.assertEqual(self.sausage.quantity, 10)
+
+    def test_non_numeric_quantity_is_rejected(self):
+        result = self.flush({"product": self.sausage.id, "quantity": "x"})
+        self.assertIn("Item 1: quantity: Enter a whole number.", result["errors"])
+        self.assertFalse(Sale.objects.exists())
+
+    def test_one_bad_sale_does_not_block_the_others(self):
+        entries = [
+            {"key": "a", "sale": {"payment_method": "cash"}, "items": [{"product": self.sausage.id, "quantity": 0}]},
+            {"key": "b", "sale": {"payment_method": "cash"}, "items": [{"product": self.sausage.id, "quantity": 1}]},
+        ]
+        results = commit_sale_batch(entries=entries, user=self.user, sale_type="retail")
+        self.assertEqual([r["status"] for r in results], ["error", "created"])
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_commit_sale_items_guards_without_the_form(self):
+        sale = Sale.objects.create(created_by=self.user)
+        self.size.is_active = False
+        self.size.save()
+        for lines in (
+            [(self.fish.id, self.size.id, 1)],
+            [(self.sausage.id, None, Decimal("1.9"))],
+            [(self.sausage.id, None, "x")],
+        ):
+            with self.assertRaises(ValueError):
+                commit_sale_items(sale=sale, lines=lines, sale_type="retail")
+        self.sausage.refresh_from_db()
+        self.assertEqual(self.sausage.quantity, 10)
+
+
+class ReceiptsBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser("owner", password="pw")
+        self.client.force_login(self.user)
+        Sale.objects.create(created_by=self.user, total_amount=Decimal("5.00"))
 
-# Create your tests here.
+    def test_requires_an_applied_filter(self):
+        url = reverse("receipts_batch")
+        for params in ({}, {"start": "garbage"}, {"start": "2026-13-01", "end": "x"}, {"preset": "all"}):
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+        self.assertEqual(self.client.get(url, {"preset": "today"}).status_code, 200)
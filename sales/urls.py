@@ -7,11 +7,14 @@ from . import views
 
 urlpatterns = [
     path("create/", views.create_sale, name="create_sale"),
+    path("create/catalog/", views.pos_catalog, name="pos_catalog"),
+    path("create/batch/", views.sales_batch, name="sales_batch"),
     path("sales/", views.sale_list, name="sale_list"),
     path("credits/", views.credit_sales_list, name="credit_sales_list"),
     path("credits/<int:sale_id>/pay/", views.credit_payment_add, name="credit_payment_add"),
     path("sales/receipt/<int:sale_id>/", views.sale_receipt, name="sale_receipt"),
     path("receipt/<int:sale_id>/", views.receipt_view, name="receipt_view"),
+    path("receipts/batch/", views.receipts_batch, name="receipts_batch"),
     path("sales/retail/", views.retail_sales_list, name="retail_sales_list"),
     path("sales/wholesale/", views.wholesale_sales_list, name="wholesale_sales_list")
 ]
@@ -1,9 +1,9 @@
 from decimal import Decimal
 import json
-from io import BytesIO
 import base64
-import qrcode
+import tempfile
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils import timezone
@@ -14,111 +14,48 @@ from django.db import transaction
 from django.db.models import Sum, F, ExpressionWrapper, DecimalField
 
 # from sales.utils import visible_queryset_for_user
+from users.roles import get_roles, has_any_role
 from users.utils import has_any_group
 from .models import Sale, SaleItem, CreditPayment
-from .forms import SaleForm, SaleItemForm, CreditPaymentForm
+from .forms import SaleForm, SaleItemForm, SaleItemFormSet, CreditPaymentForm
+from inventory.catalog import get_catalog
 from inventory.models import Product, ProductWeightPrice
 
-from django.http import HttpResponse
-from reportlab.lib.pagesizes import A5, landscape
-from reportlab.pdfgen import canvas
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_POST
 
-from inventory.services import consume_weight
+from .receipts import qr_png, receipt_pdf, receipt_sales, write_receipts_pdf
+from .services import commit_sale, commit_sale_batch, VAT_RATE
+from analytics.services import day_bounds
+from coldstore.pagination import keyset_page, parse_per_page
 
 # from .services import deduct_weight_from_product
-VAT_RATE = Decimal("0.04")  # 4.5%
 
 def user_sale_type(user):
-    if user.groups.filter(name="Wholesale").exists():
+    roles = get_roles(user)
+    if "Wholesale" in roles:
         return "wholesale"
-    if user.groups.filter(name="Retail").exists():
+    if "Retail" in roles:
         return "retail"
     return "retail"
 
-# Stock deduction logic (matches client box rule)
-def consume_weight_from_product(product, kg_to_sell: Decimal):
-    """
-    Deduct kg from a weighted product WITHOUT deducting a box until the remaining hits 0.
-    Boxes only decrement when cumulative sold reaches exactly box weight.
-    """
-    if not product.is_weighted:
-        raise ValueError("Product is not weighted.")
-
-    bw = Decimal(product.box_weight_kg or 0)
-    if bw <= 0:
-        raise ValueError("Product box_weight_kg is not set.")
-
-    if product.boxes_in_stock <= 0:
-        raise ValueError("No boxes in stock.")
-
-    # initialize remaining
-    if Decimal(product.box_remaining_kg or 0) <= 0:
-        product.box_remaining_kg = bw
-
-    # check available
-    available = product.available_weight_kg()
-    if kg_to_sell > available:
-        raise ValueError(f"Not enough weight stock. Available: {available}kg")
-
-    kg_left = Decimal(kg_to_sell)
-
-    while kg_left > 0:
-        # if current box empty, deduct a box and reset for next
-        if Decimal(product.box_remaining_kg) <= 0:
-            product.boxes_in_stock -= 1
-            if product.boxes_in_stock <= 0:
-                product.box_remaining_kg = Decimal("0.00")
-                break
-            product.box_remaining_kg = bw
-
-        take = min(kg_left, Decimal(product.box_remaining_kg))
-        product.box_remaining_kg = Decimal(product.box_remaining_kg) - take
-        kg_left -= take
-
-        # if we finished a full box -> NOW deduct 1 box and reset remaining
-        if Decimal(product.box_remaining_kg) == 0:
-            product.boxes_in_stock -= 1
-            if product.boxes_in_stock > 0:
-                product.box_remaining_kg = bw
-            else:
-                product.box_remaining_kg = Decimal("0.00")
-
-    product.save(update_fields=["boxes_in_stock", "box_remaining_kg"])
-
-# Stock deduction logic (matches client box rule)
 
 @login_required
 @has_any_group("Admin", "Staff", "Retail", "Wholesale")
 @transaction.atomic
 def create_sale(request):
-    ItemFormset = formset_factory(SaleItemForm, extra=1)
+    ItemFormset = formset_factory(SaleItemForm, formset=SaleItemFormSet, extra=1)
     stype = user_sale_type(request.user) # to prevent forcing sale type based on user group
     # stype = None  # will come from the form so it could change from reatil to wholesale and vice versa
+    catalog = get_catalog()  # cached; drives the dropdowns, the JS loads the same data from pos_catalog
 
-
-    # used by your JS to populate weight dropdown & prices
-    weights_json = {}
-    for wp in ProductWeightPrice.objects.filter(is_active=True).select_related("product"):
-        weights_json.setdefault(str(wp.product_id), []).append({
-            "id": wp.id,
-            "label": f"{wp.weight_kg:g}kg",
-            "weight_kg": float(wp.weight_kg),
-            "retail_price": float(wp.retail_price),
-            "wholesale_price": float(wp.wholesale_price),
-        })
-    
-    products_json = {}
-    for p in Product.objects.all().only("id", "unit_price", "wholesale_price", "is_weighted"):
-        products_json[str(p.id)] = {
-            "is_weighted": bool(p.is_weighted),
-            "retail_price": float(p.unit_price or 0),
-            "wholesale_price": float(p.wholesale_price or 0),
-        }
 # addedd on 26th January 2026
     
     if request.method == "POST":
         sale_form = SaleForm(request.POST)
-        formset = ItemFormset(request.POST)
+        formset = ItemFormset(request.POST, form_kwargs={"catalog": catalog})
 
         print(f"Sale form valid: {sale_form.is_valid()}")
         print(f"Formset valid: {formset.is_valid()}")
@@ -128,93 +65,21 @@ def create_sale(request):
             print(f"Formset errors: {formset.errors}")
 
         if sale_form.is_valid() and formset.is_valid():
+            lines = [
+                (f.cleaned_data["product"].id, getattr(f.cleaned_data.get("weight_price"), "id", None), f.cleaned_data.get("quantity"))
+                for f in formset
+                if f.cleaned_data and f.cleaned_data.get("product")
+            ]
             try:
                 print("Saving sale...")
-                sale = sale_form.save(commit=False)
-                sale.created_by = request.user
-                sale.sale_type = stype
-                sale.sale_type = sale_form.cleaned_data.get("sale_type") or "retail"
-                # stype = sale.sale_type  # so the rest of your code uses it.Now pricing logic will automatically follow stype.
-
-                sale.is_credit = (sale.payment_method == "credit")
-                sale.save()
-
-                subtotal = Decimal("0.00")
-
-                # lock products for safe stock update
-                # (we will fetch per item using select_for_update)
-                for f in formset:
-                    if not f.cleaned_data or not f.cleaned_data.get("product"):
-                        continue
-
-                    product = Product.objects.select_for_update().get(id=f.cleaned_data["product"].id)
-                    qty = int(f.cleaned_data.get("quantity") or 0)
-                    weight_price = f.cleaned_data.get("weight_price")  # may be None
-
-                    item = SaleItem(sale=sale, product=product, quantity=qty)
-
-                    # ✅ CASE 1: Weight sale (fish)
-                    if weight_price:
-                        # re-fetch weight_price safely
-                        wp = ProductWeightPrice.objects.select_related("product").get(id=weight_price.id)
-
-                        # force correct pricing server-side
-                        item.weight_price = wp
-                        item.unit_price = wp.wholesale_price if stype == "wholesale" else wp.retail_price
-
-                        sold_kg = Decimal(qty) * Decimal(wp.weight_kg)
-                        consume_weight(product=product, kg_to_sell=sold_kg)
-
-                        # consume_weight_from_product(product, sold_kg)
-
-                    # ✅ CASE 2: Normal unit sale (sausage)
-                    else:
-                        item.unit_price = product.wholesale_price if stype == "wholesale" else product.unit_price
-
-                        if product.is_weighted:
-                            # If weighted product but user didn’t choose weight size, block it
-                            raise ValueError(f"{product.name} is weighted. Please select a weight size.")
-                        if qty > product.quantity:
-                            raise ValueError(f"Not enough stock for {product.name}. Available: {product.quantity}")
-
-                        product.quantity = max(0, product.quantity - qty)
-                        product.save(update_fields=["quantity"])
-
-                    item.save()
-                    subtotal += item.line_total()
-
-                # totals
-                discount = Decimal(sale.discount or Decimal("0.00"))
-                after_discount = max(Decimal("0.00"), subtotal - discount)
-
-                apply_vat = bool(sale.apply_vat)
-                vat = (after_discount * VAT_RATE).quantize(Decimal("0.01")) if apply_vat else Decimal("0.00")
-                grand = (after_discount + vat).quantize(Decimal("0.01"))
-
-                sale.subtotal_amount = after_discount
-                sale.vat_amount = vat
-                sale.total_amount = grand
-                sale.save(update_fields=["subtotal_amount", "vat_amount", "total_amount"])
-
-                # credit
-                if sale.is_credit:
-                    amount_paid = Decimal(sale_form.cleaned_data.get("amount_paid") or Decimal("0.00"))
-                    amount_paid = max(Decimal("0.00"), min(amount_paid, grand))
-
-                    if amount_paid > 0:
-                        CreditPayment.objects.create(
-                            sale=sale,
-                            amount=amount_paid,
-                            payment_method="cash",
-                            reference="",
-                            received_by=request.user,
-                        )
-
-                    sale.recalc_credit(save=True)
-                else:
-                    # fully paid
-                    sale.amount_paid = sale.total_amount
-                    sale.save(update_fields=["amount_paid"])
+                with transaction.atomic():
+                    sale = commit_sale(
+                        sale=sale_form.save(commit=False),
+                        lines=lines,
+                        sale_type=sale_form.cleaned_data.get("sale_type") or stype,
+                        user=request.user,
+                        amount_paid=sale_form.cleaned_data.get("amount_paid") or Decimal("0.00"),
+                    )
 
                 print(f"Redirecting to receipt for sale {sale.id}")
                 return redirect("sale_receipt", sale_id=sale.id)
@@ -223,35 +88,141 @@ def create_sale(request):
                 sale_form.add_error(None, f"Error saving sale: {str(e)}")
     else:
         sale_form = SaleForm()
-        formset = ItemFormset()
+        formset = ItemFormset(form_kwargs={"catalog": catalog})
     return render(request, "sales/create_sale.html", {
         "sale_form": sale_form,
         "formset": formset,
         "sale_type": stype,
-        "weights_json": json.dumps(weights_json),
-        "products_json": json.dumps(products_json),  # ✅ ADD THIS
     })
+
+
+@login_required
+@has_any_group("Admin", "Staff", "Retail", "Wholesale")
+def pos_catalog(request):
+    """
+    Products and weight sizes for the POS screen, served from the versioned catalog cache.
+    The page fetches this once and revalidates with If-None-Match, so an unchanged
+    catalog costs a 304 and no queries.
+    """
+    catalog = get_catalog()
+    response = get_conditional_response(request, etag=catalog["etag"])
+    if response is None:
+        response = HttpResponse(catalog["json"], content_type="application/json")
+    response["ETag"] = catalog["etag"]
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+MAX_BATCH_SALES = 200
+
+
+@login_required
+@has_any_group("Admin", "Staff", "Retail", "Wholesale")
+@require_POST
+def sales_batch(request):
+    """
+    JSON API for tills that queue sales while offline and flush them when back online:
+    {"sales": [{"key": "<uuid>", "sale": {"payment_method": "cash", ...},
+                "items": [{"product": 1, "weight_price": 4, "quantity": 2}]}, ...]}
+    Same pricing and stock rules as create_sale; replayed keys are no-ops.
+    Responds with one result per sale (see services.commit_sale_batch).
+    """
+    try:
+        entries = json.loads(request.body)["sales"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": 'Expected a JSON body {"sales": [...]}.'}, status=400)
+    if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+        return JsonResponse({"error": '"sales" must be a list of objects.'}, status=400)
+    if len(entries) > MAX_BATCH_SALES:
+        return JsonResponse({"error": f"At most {MAX_BATCH_SALES} sales per batch."}, status=400)
+
+    results = commit_sale_batch(entries=entries, user=request.user, sale_type=user_sale_type(request.user))
+    return JsonResponse({"results": results})
     
     
 
 
+def _filtered_sales(request, qs):
+    """
+    Apply the list filters (?q, ?preset, ?start, ?end) and return (qs, context).
+    Dates become a timestamp range so the (timestamp, id) indexes stay usable;
+    context["start_date"] / ["end_date"] are the dates actually applied (None if unparseable).
+    """
+    q = (request.GET.get("q") or "").strip()
+    start = (request.GET.get("start") or "").strip()    # YYYY-MM-DD
+    end = (request.GET.get("end") or "").strip()        # YYYY-MM-DD
+    preset = (request.GET.get("preset") or "").strip()  # today | week | month | all
+    per_page = parse_per_page(request.GET.get("per_page"))
+
+    # Search by customer name/phone
+    if q:
+        qs = qs.filter(Q(customer_name__icontains=q) | Q(customer_phone__icontains=q))
+
+    today = timezone.localdate()
+    start_date = end_date = None
+    if preset == "today":
+        start_date = end_date = today
+    elif preset == "week":
+        start_date, end_date = today - timedelta(days=6), today
+    elif preset == "month":
+        start_date, end_date = today - timedelta(days=29), today
+    elif preset != "all":
+        # Custom dates
+        try:
+            start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+            end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+        except ValueError:
+            start_date = end_date = None
+
+    if start_date or end_date:
+        lo, hi = day_bounds(start_date or today, end_date or today)
+        if start_date:
+            qs = qs.filter(timestamp__gte=lo)
+        if end_date:
+            qs = qs.filter(timestamp__lt=hi)
+
+    filters = {"q": q, "preset": preset, "start": start, "end": end, "per_page": per_page}
+    # carried over to the pager links (with ?type for Admin/Accountant)
+    carry = {**filters, "type": request.GET.get("type") or ""}
+    return qs, {
+        **filters, "start_date": start_date, "end_date": end_date,
+        "filter_query": urlencode({k: v for k, v in carry.items() if v}),
+    }
+
+
+def _render_sale_page(request, qs, template, extra=None):
+    qs, ctx = _filtered_sales(request, qs)
+    page_obj = keyset_page(
+        qs.select_related("created_by").prefetch_related("items"),
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=ctx["per_page"],
+    )
+    return render(request, template, {
+        "sales": page_obj.object_list,
+        "page_obj": page_obj,
+        **ctx,
+        **(extra or {}),
+    })
+
+
 @login_required
 @has_any_group("Admin", "Staff", "Accountant", "Retail", "Wholesale")
 def sale_list(request):
-    qs = Sale.objects.all().order_by("-timestamp")
+    qs = Sale.objects.all()
 
     # ✅ Retail/Wholesale users only see their type
-    if request.user.groups.filter(name="Wholesale").exists():
+    if "Wholesale" in request.user_roles:
         qs = qs.filter(sale_type="wholesale")
-    elif request.user.groups.filter(name="Retail").exists():
+    elif "Retail" in request.user_roles:
         qs = qs.filter(sale_type="retail")
 
     # ✅ Admin/Accountant can filter with ?type=retail or ?type=wholesale
     t = request.GET.get("type")
-    if request.user.groups.filter(name__in=["Admin", "Accountant"]).exists() and t in ["retail", "wholesale"]:
+    if has_any_role(request.user, "Admin", "Accountant") and t in ["retail", "wholesale"]:
         qs = qs.filter(sale_type=t)
 
-    return render(request, "sales/sale_list.html", {"sales": qs})
+    return _render_sale_page(request, qs, "sales/sale_list.html")
 
 
 # @login_required
@@ -339,15 +310,15 @@ def sale_list(request):
 @login_required
 @has_any_group("Admin", "Accountant", "Retail")
 def retail_sales_list(request):
-    qs = Sale.objects.filter(sale_type="retail").order_by("-timestamp")
-    return render(request, "sales/sale_list.html", {"sales": qs, "forced_type": "retail"})
+    qs = Sale.objects.filter(sale_type="retail")
+    return _render_sale_page(request, qs, "sales/sale_list.html", {"forced_type": "retail"})
 
 
 @login_required
 @has_any_group("Admin", "Accountant", "Wholesale")
 def wholesale_sales_list(request):
-    qs = Sale.objects.filter(sale_type="wholesale").order_by("-timestamp")
-    return render(request, "sales/sale_list.html", {"sales": qs, "forced_type": "wholesale"})
+    qs = Sale.objects.filter(sale_type="wholesale")
+    return _render_sale_page(request, qs, "sales/sale_list.html", {"forced_type": "wholesale"})
 
 
 @login_required
@@ -359,17 +330,18 @@ def credit_sales_list(request):
         output_field=DecimalField(max_digits=12, decimal_places=2)
     )
 
-    qs = Sale.objects.filter(is_credit=True).annotate(balance_due_db=balance_expr).filter(balance_due_db__gt=0).order_by("-timestamp")
+    # open credit = sale_open_credit_idx's condition
+    qs = Sale.objects.filter(is_credit=True, total_amount__gt=F("amount_paid")).annotate(balance_due_db=balance_expr)
 
-    if request.user.groups.filter(name="Wholesale").exists():
+    if "Wholesale" in request.user_roles:
         qs = qs.filter(sale_type="wholesale")
-    elif request.user.groups.filter(name="Retail").exists():
+    elif "Retail" in request.user_roles:
         qs = qs.filter(sale_type="retail")
 
+    # the total covers every open credit, not just the page shown
     total_outstanding = qs.aggregate(s=Sum("balance_due_db"))["s"] or Decimal("0.00")
 
-    return render(request, "sales/credit_sales_list.html", {
-        "sales": qs,
+    return _render_sale_page(request, qs, "sales/credit_sales_list.html", {
         "total_outstanding": total_outstanding,
     })
 
@@ -380,9 +352,9 @@ def credit_sales_list(request):
 def credit_payment_add(request, sale_id):
     sale = get_object_or_404(Sale, id=sale_id, is_credit=True)
 
-    if request.user.groups.filter(name="Wholesale").exists() and sale.sale_type != "wholesale":
+    if "Wholesale" in request.user_roles and sale.sale_type != "wholesale":
         return redirect("credit_sales_list")
-    if request.user.groups.filter(name="Retail").exists() and sale.sale_type != "retail":
+    if "Retail" in request.user_roles and sale.sale_type != "retail":
         return redirect("credit_sales_list")
 
     if request.method == "POST":
@@ -406,116 +378,78 @@ def credit_payment_add(request, sale_id):
     return render(request, "sales/credit_payment_add.html", {"sale": sale, "form": form})
 
 def receipt_view(request, sale_id):
-    sale = get_object_or_404(Sale, id=sale_id)
-    items = sale.items.all()
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=landscape(A5))
-    width, height = landscape(A5)
-
-    p.setFont("Helvetica-Bold", 14)
-    p.drawCentredString(width/2, height - 20, "❄️ FRESH CHILL COLD STORE ❄️")
-    p.setFont("Helvetica", 9)
-    p.drawCentredString(width/2, height - 34, "Accra - Ghana | Tel: +233 20 854 3630")
-
-    y = height - 56
-    p.setFont("Helvetica", 8)
-    p.drawString(20, y, f"Date: {sale.timestamp.strftime('%Y-%m-%d %H:%M')}")
-    p.drawRightString(width - 20, y, f"Receipt: CS-{sale.id:04d}")
-    y -= 14
+    sale = get_object_or_404(receipt_sales(Sale.objects.all()), id=sale_id)
+    path, version = receipt_pdf(sale)
+
+    etag = f'"{version}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(default_storage.open(path, "rb"), content_type="application/pdf")
+        response["Content-Disposition"] = f'inline; filename="receipt_{sale.id}.pdf"'
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-    cashier = sale.created_by.get_full_name() if sale.created_by and sale.created_by.get_full_name() else (sale.created_by.username if sale.created_by else "—")
-    p.drawString(20, y, f"Cashier: {cashier}")
-    y -= 12
-    p.drawString(20, y, f"Customer: {sale.customer_name or 'Walk-in Customer'}")
-    y -= 12
-    p.drawString(20, y, f"Payment: {sale.get_payment_method_display()}")
 
-    y -= 18
-    p.setFont("Helvetica-Bold", 9)
-    p.drawString(20, y, "Item")
-    p.drawRightString(220, y, "Qty")
-    p.drawRightString(290, y, "Price (₵)")
-    p.drawRightString(370, y, "Total (₵)")
-    p.line(15, y-2, width-15, y-2)
-    y -= 12
-    p.setFont("Helvetica", 9)
+MAX_BATCH_RECEIPTS = 500
 
-    for it in items:
-        name = it.product.name if it.product else "Deleted Product"
-        if it.weight_price:
-            name = f"{name} ({it.weight_price.size_kg}kg)"
-
-        p.drawString(20, y, name[:32])
-        p.drawRightString(220, y, str(it.quantity))
-        p.drawRightString(290, y, f"{float(it.unit_price):.2f}")
-        p.drawRightString(370, y, f"{float(it.line_total()):.2f}")
-        y -= 12
-        if y < 70:
-            p.showPage()
-            y = height - 40
-            p.setFont("Helvetica", 9)
 
-    y -= 6
-    p.line(15, y, width-15, y)
-    y -= 14
+def _parse_ids(request):
+    """?ids=1,2,3 (or repeated ?ids=) -> set of ints; junk is ignored."""
+    ids = set()
+    for value in request.GET.getlist("ids"):
+        ids.update(int(v) for v in value.split(",") if v.strip().isdigit())
+    return ids
 
-    p.drawRightString(320, y, "Subtotal:")
-    p.drawRightString(370, y, f"₵{float(sale.subtotal_amount):.2f}")
-    y -= 12
 
-    if sale.apply_vat:
-        p.drawRightString(320, y, "VAT (4%):")
-        p.drawRightString(370, y, f"₵{float(sale.vat_amount):.2f}")
-        y -= 12
+@login_required
+@has_any_group("Admin", "Staff", "Accountant", "Retail", "Wholesale")
+def receipts_batch(request):
+    """
+    Reprint many receipts as one multi-page A5 PDF.
+    Takes the sale-list filters (?q customer, ?preset, ?start, ?end, ?type) and/or ?ids=1,2,3.
+    """
+    qs = Sale.objects.all()
+    if "Wholesale" in request.user_roles:
+        qs = qs.filter(sale_type="wholesale")
+    elif "Retail" in request.user_roles:
+        qs = qs.filter(sale_type="retail")
+    t = request.GET.get("type")
+    if t in ["retail", "wholesale"]:
+        qs = qs.filter(sale_type=t)
 
-    p.setFont("Helvetica-Bold", 10)
-    p.drawRightString(320, y, "Total:")
-    p.drawRightString(370, y, f"₵{float(sale.total_amount):.2f}")
+    ids = _parse_ids(request)
+    if ids:
+        qs = qs.filter(id__in=ids)
+    qs, filters = _filtered_sales(request, qs)
+    # the parsed range, not the raw strings: an unparseable ?start= filters nothing
+    if not (ids or filters["q"] or filters["start_date"] or filters["end_date"]):
+        return HttpResponse("Choose sales to print: a date range, a customer or ?ids=.", status=400)
 
-    # QR
-    try:
-        qr_text = f"Receipt:CS-{sale.id:04d}|Amount:₵{float(sale.total_amount):.2f}|Date:{sale.timestamp.strftime('%Y-%m-%d %H:%M')}"
-        qr = qrcode.make(qr_text)
-        buf = BytesIO()
-        qr.save(buf, format="PNG")
-        buf.seek(0)
-        p.drawInlineImage(buf, width - 120, 20, width=80, height=80)
-    except Exception:
-        pass
+    count = qs.count()
+    if count > MAX_BATCH_RECEIPTS:
+        return HttpResponse(
+            f"{count} receipts match; narrow the filters to at most {MAX_BATCH_RECEIPTS}.", status=400
+        )
 
-    p.setFont("Helvetica-Oblique", 8)
-    p.drawCentredString(width/2, 18, "Thank you for your purchase! — Fresh Chill Cold Store")
-
-    p.showPage()
-    p.save()
-
-    pdf = buffer.getvalue()
-    buffer.close()
-    response = HttpResponse(pdf, content_type="application/pdf")
-    response["Content-Disposition"] = f'inline; filename="receipt_{sale.id}.pdf"'
-    return response
+    # spooled to disk, then streamed back in blocks by FileResponse
+    tmp = tempfile.TemporaryFile()
+    write_receipts_pdf(qs.order_by("timestamp", "id"), tmp)
+    tmp.seek(0)
+    return FileResponse(tmp, filename=f"receipts_{timezone.localdate():%Y%m%d}.pdf", content_type="application/pdf")
 
 
 def sale_receipt(request, sale_id):
-    sale = get_object_or_404(Sale, id=sale_id)
-    items = sale.items.all()
+    sale = get_object_or_404(receipt_sales(Sale.objects.all()), id=sale_id)
 
-    qr_base64 = ""
     try:
-        qr_text = f"Receipt:CS-{sale.id:04d}|Amount:₵{float(sale.total_amount):.2f}|Date:{sale.timestamp.strftime('%Y-%m-%d %H:%M')}"
-        qr_img = qrcode.make(qr_text)
-        buf = BytesIO()
-        qr_img.save(buf, format="PNG")
-        buf.seek(0)
-        qr_base64 = base64.b64encode(buf.read()).decode("ascii")
-        buf.close()
+        qr_base64 = base64.b64encode(qr_png(sale)).decode("ascii")
     except Exception:
         qr_base64 = ""
 
     return render(request, "sales/receipt.html", {
         "sale": sale,
-        "items": items,
+        "items": sale.items.all(),
         "subtotal": sale.subtotal_amount,
         "discount": sale.discount,
         "subtotal_after_discount": sale.subtotal_amount,
@@ -0,0 +1,18 @@
+# users/middleware.py
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_roles
+
+
+class UserRolesMiddleware:
+    """
+    Exposes request.user_roles: the user's group names, resolved at most once per request
+    (and usually from the cache). Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_roles = SimpleLazyObject(lambda: get_roles(request.user))
+        return self.get_response(request)
@@ -9,3 +9,35 @@ class Profile(models.Model):
 
     def __str__(self):
         return f"{self.user.username}"
+
+
+# Role cache invalidation (see users/roles.py)
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.contrib.auth.models import Group
+
+from .roles import forget, invalidate_all, invalidate_user
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        # user.groups.add/remove/clear(...)
+        invalidate_user(instance.pk)
+        forget(instance)
+    elif pk_set:
+        # group.user_set.add/remove(...)
+        for user_id in pk_set:
+            invalidate_user(user_id)
+    else:
+        # group.user_set.clear(): members are unknown by now
+        invalidate_all()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # a renamed/deleted group changes the role names of all its members
+    invalidate_all()
@@ -0,0 +1,83 @@
+# users/roles.py
+"""
+Group-name ("role") lookup shared by the decorators, mixins, views and template tags.
+
+A user's roles are read once per request: the result is memoised on the user object, and
+across requests it sits in the shared cache (settings.CACHES) under a versioned key.
+users.models bumps the user's version when their groups change (m2m_changed) and a global
+version when a group is renamed or deleted, so stale entries are simply never read again.
+Version keys never expire; one that is missing anyway (cache cleared or culled) restarts
+at a fresh generation rather than at 1, which older entries may still carry.
+"""
+import time
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+CACHE_TIMEOUT = 60 * 60 * 24
+GLOBAL_VERSION_KEY = "user_roles:v"
+NO_ROLES = frozenset()
+
+
+def _user_version_key(user_id):
+    return f"user_roles:{user_id}:v"
+
+
+def _new_generation():
+    # later than any generation handed out before, so no old entry can match it
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # not cached yet (or evicted): start a new generation
+        cache.set(key, _new_generation(), None)
+
+
+def _versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_generation(), None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def get_roles(user):
+    """Frozenset of the user's group names (empty for anonymous users)."""
+    if user is None or not user.is_authenticated:
+        return NO_ROLES
+    roles = getattr(user, "_cached_roles", None)
+    if roles is not None:
+        return roles
+
+    vkey = _user_version_key(user.pk)
+    versions = _versions([GLOBAL_VERSION_KEY, vkey])
+    key = f"user_roles:{user.pk}:{versions[GLOBAL_VERSION_KEY]}:{versions[vkey]}"
+    names = cache.get(key)
+    if names is None:
+        names = list(Group.objects.filter(user=user).values_list("name", flat=True))
+        cache.set(key, names, CACHE_TIMEOUT)
+
+    roles = frozenset(names)
+    user._cached_roles = roles
+    return roles
+
+
+def has_any_role(user, *names):
+    return not get_roles(user).isdisjoint(names)
+
+
+def invalidate_user(user_id):
+    _bump(_user_version_key(user_id))
+
+
+def invalidate_all():
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def forget(user):
+    """Drop the per-request memo (e.g. right after changing the user's groups in the same request)."""
+    user.__dict__.pop("_cached_roles", None)
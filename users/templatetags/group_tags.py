@@ -1,9 +1,11 @@
 from django import template
 
+from users.roles import get_roles
+
 register = template.Library()
 
 @register.filter
 def has_group(user, group_name):
     if user.is_anonymous:
         return False
-    return user.groups.filter(name=group_name).exists()
+    return group_name in get_roles(user)
@@ -1,12 +1,13 @@
 
 from django import template
 
+from users.roles import get_roles
+
 register = template.Library()
 
 @register.simple_tag
 def is_super_admin(user):
-    return user.is_authenticated and (user.is_superuser or user.groups.filter
-    (name="SuperAdmin").exists())
+    return user.is_authenticated and (user.is_superuser or "SuperAdmin" in get_roles(user))
 
 # register = template.Library()
 
@@ -1,13 +1,15 @@
 # users/utils.py
 from django.contrib.auth.decorators import user_passes_test
 from django.core.exceptions import PermissionDenied
+
+from .roles import get_roles, has_any_role
  
  
 def in_group(group_name):
     def predicate(user):
         if not user.is_authenticated:
             return False
-        return user.groups.filter(name=group_name).exists() or user.is_superuser
+        return group_name in get_roles(user) or user.is_superuser
     return user_passes_test(predicate)
 
 def has_any_group(*group_names):
@@ -16,7 +18,7 @@ def has_any_group(*group_names):
             return False
         if user.is_superuser:
             return True
-        return user.groups.filter(name__in=group_names).exists()
+        return has_any_role(user, *group_names)
     return user_passes_test(predicate)
 
 # class-based view mixin:
@@ -29,7 +31,7 @@ class GroupRequiredMixin:
             return redirect_to_login(request.get_full_path())
         if request.user.is_superuser:
             return super().dispatch(request, *args, **kwargs)
-        if not request.user.groups.filter(name__in=self.required_groups).exists():
+        if not has_any_role(request.user, *self.required_groups):
             raise PermissionDenied("You do not have permission to access this resource.")
         return super().dispatch(request, *args, **kwargs)
 # usage example:
@@ -3,6 +3,8 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import Group
 
+from .roles import get_roles
+
 # @login_required
 def dashboard_view(request):
     """
@@ -21,9 +23,10 @@ def redirect_by_role(user):
     """
     if user.is_superuser:
         return "reports_summary"
-    if user.groups.filter(name="Accountant").exists():
+    roles = get_roles(user)
+    if "Accountant" in roles:
         return "reports_summary"
-    if user.groups.filter(name="Staff").exists():
+    if "Staff" in roles:
         return "inventory_dashboard"
     return "inventory_dashboard"
 